@@ -1,56 +1,146 @@
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+import numpy as np
+from src.utils.candles import empty_soa, klines_to_soa, SOA_DTYPES
 from src.utils.fvg_detector import FVGDetector
-from src.utils.data_loader import BinanceDataLoader
+from src.utils.data_loader import BinanceDataLoader, TIMEFRAME_CANDLE_MS
 from src.utils.mitigation_detector import MitigationDetector
 from src.utils.logger import setup_logger
 
 logger = setup_logger('detection_engine')
 
 class DetectionEngine:
-    def __init__(self, data_source: str, timeframe: str):
-        """Initialize the Detection Engine"""
+    def __init__(self, data_source: str, timeframe: str, data_loader: Optional[BinanceDataLoader] = None):
+        """
+        Initialize the Detection Engine
+        :param data_loader: Loader to share with the caller (and its HTTP session); a new one is created if omitted
+        """
         logger.debug(f"Initializing DetectionEngine with {data_source}, {timeframe}")
         self.data_source = data_source
         self.timeframe = timeframe
-        self.data_loader = BinanceDataLoader()
+        # Parse symbol from data source once
+        self._symbol = data_source.split('://')[1].split('_')[0]
+        self.data_loader = data_loader or BinanceDataLoader()
         self.bullish_fvgs = []
         self.bearish_fvgs = []
-        self.all_candles = []
+        # Struct-of-arrays view of the loaded candles (oldest first)
+        self.candles_soa = empty_soa()
+        # Detectors are created on first load and re-pointed at new columns afterwards
+        self._fvg_detector = None
+        self._mit_detector = None
 
-    def detect_fvgs(self) -> Dict[str, Any]:
-        """Detect FVGs from last 200 candles"""
-        # Get symbol from data source
-        symbol = self.data_source.split('://')[1].split('_')[0]
+    def warmup(self):
+        """Run detection once on a dummy candle buffer so JIT compilation happens before the live loop"""
+        dummy_soa = {name: np.zeros(5, dtype=dtype) for name, dtype in SOA_DTYPES.items()}
+        FVGDetector.from_soa(dummy_soa).detect_fvgs_only()
+
+    def _load_batch(self, symbol: str) -> bool:
+        """Load the latest candle window and materialize it into SoA columns"""
+        return self._store_batch(self.data_loader.load_candles(symbol=symbol, timeframe=self.timeframe))
+
+    async def _load_batch_async(self, symbol: str) -> bool:
+        """Async variant of _load_batch using the loader's pooled HTTP session"""
+        return self._store_batch(await self.data_loader.load_candles_async(symbol=symbol, timeframe=self.timeframe))
+
+    def _store_batch(self, candles_soa: Dict[str, np.ndarray]) -> bool:
+        if not len(candles_soa['time']):
+            # Drop the stale window so a failed load is never mistaken for a new bar
+            self.candles_soa = empty_soa()
+            return False
+
+        # Each load returns the full window, so the columns are replaced rather than appended
+        self.candles_soa = candles_soa
+        return True
+
+    def detect_fvgs(self, current_time: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Detect FVGs from last 200 candles
+        :param current_time: Timestamp the caller attaches to the results itself; when given,
+            'last_update' is left out instead of formatting a new one
+        """
+        symbol = self._symbol
         
         # Load candles
-        candles = self.data_loader.load_candles(symbol=symbol, timeframe=self.timeframe)
-        if not candles:
+        if not self._load_batch(symbol):
+            logger.warning(f"No candles found for {symbol} {self.timeframe}")
+            return self._create_empty_results(with_timestamp=current_time is None)
+
+        return self._detect_loaded(current_time)
+
+    async def detect_fvgs_async(self, current_time: Optional[datetime] = None) -> Dict[str, Any]:
+        """Async variant of detect_fvgs; candles are fetched without blocking the event loop"""
+        symbol = self._symbol
+
+        # Load candles
+        if not await self._load_batch_async(symbol):
             logger.warning(f"No candles found for {symbol} {self.timeframe}")
-            return self._create_empty_results()
+            return self._create_empty_results(with_timestamp=current_time is None)
+
+        return self._detect_loaded(current_time)
+
+    def apply_kline(self, kline: List[Any]) -> Optional[bool]:
+        """
+        Merge one streamed kline into the loaded candle window
+        The newest candle is replaced while it is still forming; a new candle is appended and
+        the oldest dropped, so the window keeps its length.
+        Returns False if nothing is loaded yet or the kline is older than the newest candle,
+        and None if it is not the next candle either (candles were missed), in which case the
+        window must be reloaded.
+        """
+        times = self.candles_soa['time']
+        if not len(times) or kline[0] < times[-1]:
+            return False
+        if kline[0] != times[-1] and kline[0] != times[-1] + TIMEFRAME_CANDLE_MS[self.timeframe]:
+            return None
 
-        # Initialize detectors with candles
-        fvg_detector = FVGDetector(candles)
+        row = klines_to_soa([kline])
+        # New arrays rather than in-place writes: the detectors compare against the previous window
+        keep = slice(None, -1) if kline[0] == times[-1] else slice(1, None)
+        self.candles_soa = {
+            name: np.concatenate((column[keep], row[name])) for name, column in self.candles_soa.items()
+        }
+        return True
+
+    def redetect(self, current_time: Optional[datetime] = None) -> Dict[str, Any]:
+        """Re-run detection on the loaded candles without fetching, e.g. after apply_kline"""
+        if not len(self.candles_soa['time']):
+            return self._create_empty_results(with_timestamp=current_time is None)
+        return self._detect_loaded(current_time)
+
+    def _detect_loaded(self, current_time: Optional[datetime]) -> Dict[str, Any]:
+        """Run FVG and mitigation detection over the currently loaded candle columns"""
+        # Point detectors at the current candle columns
+        if self._fvg_detector is None:
+            self._fvg_detector = FVGDetector.from_soa(self.candles_soa)
+            self._mit_detector = MitigationDetector.from_soa(self.candles_soa)
+        else:
+            self._fvg_detector.update(self.candles_soa)
+            self._mit_detector.update(self.candles_soa)
         
         # Detect FVGs
-        bullish_fvgs, bearish_fvgs = fvg_detector.detect_fvgs_only()
+        bullish_fvgs, bearish_fvgs = self._fvg_detector.detect_fvgs_only()
         
         # Check for mitigations
-        mitigation_detector = MitigationDetector(candles)
-        mitigation_detector.check_mitigations(bullish_fvgs, bearish_fvgs)
+        self._mit_detector.check_mitigations(bullish_fvgs, bearish_fvgs)
 
         results = {
             'bullish_fvgs': bullish_fvgs,
             'bearish_fvgs': bearish_fvgs,
-            'last_update': datetime.utcnow().isoformat()
         }
+        if current_time is None:
+            results['last_update'] = datetime.utcnow().isoformat()
 
         return results
 
-    def _create_empty_results(self) -> Dict[str, Any]:
+    def get_latest_candle_time(self) -> Optional[int]:
+        """Open time (epoch ms) of the newest loaded candle, None if nothing is loaded"""
+        times = self.candles_soa['time']
+        return int(times[-1]) if len(times) else None
+
+    def _create_empty_results(self, with_timestamp: bool = True) -> Dict[str, Any]:
         """Create empty results structure"""
-        return {
-            'bullish_fvgs': [],
-            'bearish_fvgs': [],
-            'last_update': datetime.utcnow().isoformat()
-        }
\ No newline at end of file
+        # Fresh lists every time; callers may mutate the returned results
+        results = {'bullish_fvgs': [], 'bearish_fvgs': []}
+        if with_timestamp:
+            results['last_update'] = datetime.utcnow().isoformat()
+        return results
\ No newline at end of file
@@ -2,16 +2,15 @@ import os
 import sys
 from pathlib import Path
 import json
-import pandas as pd
 from datetime import datetime, timedelta, UTC
 from blessed import Terminal
 import time
 from signal import signal, SIGINT
 from datetime import timezone
-import threading
-from queue import Queue
 import asyncio
+from contextlib import aclosing
 import logging
+from typing import Dict, Any, Optional
 
 # Add the src directory to the Python path
 current_dir = Path(__file__).parent
@@ -20,7 +19,7 @@ if str(project_root) not in sys.path:
     sys.path.append(str(project_root))
 
 from src.backtest.detect_engine import DetectionEngine
-from src.utils.data_loader import BinanceDataLoader
+from src.utils.data_loader import BinanceDataLoader, TIMEFRAME_MAPPING
 from src.utils.display_manager import DisplayManager
 from src.utils.logger import setup_logger
 
@@ -29,7 +28,34 @@ term = Terminal()
 
 logger = setup_logger('fvg_monitor')
 
+# Seconds to wait past a candle close so the exchange has published the new candle
+CANDLE_CLOSE_MARGIN = 0.5
+# Seconds to wait before reloading over REST after the kline stream skipped candles
+KLINE_RESYNC_DELAY = 1.0
+# Minimum seconds between price-only redraws (30 Hz)
+RENDER_INTERVAL = 1 / 30
+
+class LatestSlot:
+    """Single-value mailbox that only keeps the newest item"""
+
+    def __init__(self, wake_event: asyncio.Event):
+        self._value = None
+        self._wake_event = wake_event
+
+    def set(self, value: Dict[str, Any]):
+        """Overwrite any pending value and wake the consumer"""
+        self._value = value
+        self._wake_event.set()
+
+    def take(self) -> Optional[Dict[str, Any]]:
+        """Return the pending value, if any, and clear the slot"""
+        value, self._value = self._value, None
+        return value
+
 class FVGMonitor:
+    # Price retry delays in seconds, indexed by consecutive error count (0.2 * 1.5**n, capped at 2 s)
+    _BACKOFF = tuple(min(0.2 * (1.5 ** n), 2.0) for n in range(16))
+
     def __init__(self):
         logger.debug("Initializing FVG Monitor")
         self.running = True
@@ -43,104 +69,182 @@ class FVGMonitor:
         self.last_update = None
         self.last_fvg_update = None
         
-        # Thread-safe queues for communication
-        self.fvg_queue = Queue()
-        self.price_queue = Queue()
+        # Latest-value slots for communication between the monitor tasks;
+        # only the newest update is ever displayed. Both wake the display via update_event.
+        self.update_event = asyncio.Event()
+        self.fvg_slot = LatestSlot(self.update_event)
+        self.price_slot = LatestSlot(self.update_event)
+        # Set on shutdown so sleeping tasks wake immediately
+        self.stop_event = asyncio.Event()
+        self._loop = None
         
         # Add detector instance
         self.detector = None
+        # Open time of the newest candle seen by the detection loop
+        self._last_bar_ts = None
 
     def initialize_detector(self):
         """Initialize detection engine with current settings"""
         virtual_data_path = f"binance://{self.symbol}_{self.timeframe}"
         self.detector = DetectionEngine(
             data_source=virtual_data_path,
-            timeframe=self.timeframe
+            timeframe=self.timeframe,
+            data_loader=self.data_loader
         )
+        # Compile the detection kernel up front instead of stalling the first detection cycle
+        self.detector.warmup()
 
-    def detection_thread(self):
-        """Thread for FVG detection"""
-        logger.debug("Starting detection thread")
+    async def detection_loop(self):
+        """Task for FVG detection"""
+        logger.debug("Starting detection loop")
         while self.running:
             try:
                 current_time = datetime.now(UTC)
-                logger.debug(f"Detection cycle at {current_time}")
+                logger.debug("Detection cycle at %s", current_time)
                 
                 # Collect new FVGs
-                results = self.detector.detect_fvgs()
-                if results:
-                    self.fvg_queue.put({
-                        'bullish': results['bullish_fvgs'],
-                        'bearish': results['bearish_fvgs'],
-                        'time': current_time
-                    })
-                    self.last_fvg_update = current_time
+                results = await self.detector.detect_fvgs_async(current_time)
+                bar_ts = self.detector.get_latest_candle_time()
+                if bar_ts is None:
+                    await self._sleep(1)  # No candles loaded, retry in 1 second
+                    continue
+                if bar_ts == self._last_bar_ts:
+                    await self._sleep(0.5)  # New candle not published yet
+                    continue
+
+                self._last_bar_ts = bar_ts
+                self._publish_fvgs(results, current_time)
                 
-                time.sleep(1)  # Check every 1 second
+                # Later candles arrive over the kline stream; if it drops, fall back to
+                # polling REST once per candle close until the next successful load
+                if await self._until_stopped(self._follow_kline_stream()):
+                    # The stream skipped candles; reload the window over REST after a short pause
+                    self._last_bar_ts = None
+                    await self._sleep(KLINE_RESYNC_DELAY)
+                    continue
+                await self._sleep_until_candle_close()
                 
             except Exception as e:
-                logger.error(f"Detection thread error: {str(e)}", exc_info=True)
-                time.sleep(1)
+                logger.error(f"Detection loop error: {str(e)}", exc_info=True)
+                await self._sleep(1)
+
+    async def _follow_kline_stream(self) -> bool:
+        """
+        Apply live klines from the WebSocket stream, re-running detection whenever a candle closes
+        Returns True if the stream skipped candles and the window needs reloading.
+        """
+        try:
+            # aclosing releases the WebSocket as soon as we stop reading, not when the generator is collected
+            async with aclosing(self.data_loader.stream_klines(self.symbol, self.timeframe)) as klines:
+                async for kline, closed in klines:
+                    applied = self.detector.apply_kline(kline)
+                    if applied is None:
+                        logger.warning("Kline stream skipped candles, reloading over REST")
+                        return True
+                    if not applied:
+                        continue
+                    if closed:
+                        current_time = datetime.now(UTC)
+                        results = self.detector.redetect(current_time)
+                        self._last_bar_ts = self.detector.get_latest_candle_time()
+                        self._publish_fvgs(results, current_time)
+        except Exception as e:
+            logger.error(f"Kline stream error: {str(e)}", exc_info=True)
+        return False
+
+    def _publish_fvgs(self, results: Dict[str, Any], current_time: datetime):
+        self.fvg_slot.set({
+            'bullish': results['bullish_fvgs'],
+            'bearish': results['bearish_fvgs'],
+            'time': current_time
+        })
+        self.last_fvg_update = current_time
 
-    def price_thread(self):
-        """Thread for price updates"""
+    async def price_loop(self):
+        """Task for price updates"""
         consecutive_errors = 0
         while self.running:
             try:
-                current_time = datetime.now(UTC)
-                price = self.data_loader.get_latest_price(self.symbol)
+                # Raw timestamp; the display formats it only when it is actually rendered
+                current_time_ns = time.time_ns()
+                price = await self.data_loader.get_latest_price_async(self.symbol)
                 if price:
-                    self.price_queue.put({
+                    self.price_slot.set({
                         'price': price,
-                        'time': current_time.strftime('%Y-%m-%d %H:%M:%S UTC')
+                        'time': current_time_ns
                     })
                     consecutive_errors = 0
-                    time.sleep(0.2)
+                    await self._sleep(0.2)
                 else:
                     consecutive_errors += 1
-                    time.sleep(min(0.2 * (1.5 ** consecutive_errors), 2.0))
+                    await self._sleep(self._BACKOFF[min(consecutive_errors, 15)])
                     
             except Exception as e:
-                logger.error(f"Price thread error: {str(e)}", exc_info=True)
+                logger.error(f"Price loop error: {str(e)}", exc_info=True)
                 consecutive_errors += 1
-                time.sleep(min(0.2 * (1.5 ** consecutive_errors), 2.0))
+                await self._sleep(self._BACKOFF[min(consecutive_errors, 15)])
+
+    async def _sleep(self, seconds: float):
+        """Sleep for up to `seconds`, returning early if the monitor is stopping"""
+        try:
+            await asyncio.wait_for(self.stop_event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _until_stopped(self, coro):
+        """
+        Run coro until it finishes or the monitor stops, cancelling it in the latter case
+        Returns the result of coro, or None if it was cancelled.
+        """
+        task = asyncio.ensure_future(coro)
+        stop = asyncio.ensure_future(self.stop_event.wait())
+        try:
+            await asyncio.wait((task, stop), return_when=asyncio.FIRST_COMPLETED)
+            return task.result() if task.done() else None
+        finally:
+            stop.cancel()
+            task.cancel()
 
-    def display_thread(self):
-        """Thread for display updates"""
+    async def _sleep_until_candle_close(self):
+        """Sleep until the forming candle closes (plus margin), or the monitor stops"""
+        await self._sleep(self.data_loader.get_seconds_to_candle_close(self.timeframe) + CANDLE_CLOSE_MARGIN)
+
+    async def display_loop(self):
+        """Task for display updates"""
+        update_needed = False
+        fvgs_changed = False
+        last_render = 0.0
         while self.running:
             try:
-                current_time = datetime.now(UTC)
-                update_needed = False
-                
-                # Process all queued data at once
-                fvg_updates = []
-                price_updates = []
-                
-                # Batch process FVG updates
-                while not self.fvg_queue.empty():
-                    fvg_data = self.fvg_queue.get()
-                    fvg_updates.append(fvg_data)
+                # Wait until either producer publishes an update, or until a deferred redraw is due
+                timeout = max(last_render + RENDER_INTERVAL - time.monotonic(), 0) if update_needed else 1
+                try:
+                    await asyncio.wait_for(self.update_event.wait(), timeout=timeout)
+                    self.update_event.clear()
+                except asyncio.TimeoutError:
+                    if not update_needed:
+                        continue
                 
                 # Use most recent FVG update
-                if fvg_updates:
-                    latest_fvg = fvg_updates[-1]
+                latest_fvg = self.fvg_slot.take()
+                if latest_fvg:
                     self.bullish_fvgs = latest_fvg['bullish']
                     self.bearish_fvgs = latest_fvg['bearish']
                     self.last_fvg_update = latest_fvg['time']
                     update_needed = True
-                
-                # Batch process price updates
-                while not self.price_queue.empty():
-                    price_data = self.price_queue.get()
-                    price_updates.append(price_data)
+                    fvgs_changed = True
                 
                 # Use most recent price update
-                if price_updates:
-                    latest_price = price_updates[-1]
+                latest_price = self.price_slot.take()
+                if latest_price:
                     self.latest_price = latest_price['price']
                     self.last_update = latest_price['time']
                     update_needed = True
                 
+                # Coalesce price-only bursts to one redraw per RENDER_INTERVAL; new FVGs render at once
+                if not fvgs_changed and time.monotonic() - last_render < RENDER_INTERVAL:
+                    continue
+                
                 # Update display when new data arrives
                 if update_needed and self.latest_price and (self.bullish_fvgs or self.bearish_fvgs):
                     self.display_manager.update_screen(
@@ -151,16 +255,48 @@ class FVGMonitor:
                         bullish_fvgs=self.bullish_fvgs,
                         bearish_fvgs=self.bearish_fvgs
                     )
-                
-                time.sleep(1)
+                    last_render = time.monotonic()
+                update_needed = False
+                fvgs_changed = False
                 
             except Exception as e:
-                logger.error(f"Display thread error: {str(e)}", exc_info=True)
-                time.sleep(1)
+                logger.error(f"Display loop error: {str(e)}", exc_info=True)
+                await self._sleep(1)
+
+    async def _run(self):
+        """Run all monitor tasks on a single event loop"""
+        self._loop = asyncio.get_running_loop()
+        try:
+            # Handle Ctrl+C on the loop itself so shutdown is just another event
+            self._loop.add_signal_handler(SIGINT, self._request_stop)
+        except NotImplementedError:
+            pass  # No loop signal handlers on Windows; handle_exit stays installed
+        try:
+            await asyncio.gather(
+                self.detection_loop(),
+                self.price_loop(),
+                self.display_loop()
+            )
+        finally:
+            await self.data_loader.close_session()
+
+    def _request_stop(self):
+        """Stop all monitor tasks; must run on the event loop"""
+        if not self.running:
+            return
+        self.running = False
+        # Wake every waiting task so asyncio.run can return
+        self.stop_event.set()
+        self.update_event.set()
+        print("\nShutting down...")
 
     def handle_exit(self, signum, frame):
-        """Handle exit signal"""
+        """Handle exit signal outside the event loop"""
         self.running = False
+        if self._loop is not None:
+            # Wake every waiting task; signal handlers may only hand work to the loop thread-safely
+            self._loop.call_soon_threadsafe(self.stop_event.set)
+            self._loop.call_soon_threadsafe(self.update_event.set)
         print("\nShutting down...")
         time.sleep(1)
         print(term.normal + term.show_cursor)
@@ -168,6 +304,8 @@ class FVGMonitor:
 
     def monitor_fvgs(self, symbol: str, timeframe: str):
         """Main monitoring loop"""
+        if timeframe not in TIMEFRAME_MAPPING:
+            raise ValueError(f"Invalid timeframe: {timeframe}")
         self.symbol = symbol
         self.timeframe = timeframe
         signal(SIGINT, self.handle_exit)
@@ -178,19 +316,8 @@ class FVGMonitor:
         print(term.clear + term.hide_cursor)
         
         try:
-            # Start threads
-            threads = [
-                threading.Thread(target=self.detection_thread, daemon=True),
-                threading.Thread(target=self.price_thread, daemon=True),
-                threading.Thread(target=self.display_thread, daemon=True)
-            ]
-            
-            for thread in threads:
-                thread.start()
-            
-            # Wait for threads
-            while self.running:
-                time.sleep(0.1)
+            # Run detection, price and display tasks until exit
+            asyncio.run(self._run())
                 
         except Exception as e:
             logger.error(f"Main thread error: {str(e)}", exc_info=True)
@@ -0,0 +1,76 @@
+from typing import List, Dict, Any
+import calendar
+import time
+import numpy as np
+
+CANDLE_TIME_FORMAT = '%Y-%m-%d %H:%M:%S UTC'
+
+# Column layout of the struct-of-arrays candle buffer.
+# High/Low stay float64: they feed the gap bounds, and float32 cannot hold
+# cent precision above ~65k (BTCUSDT). Columns the detectors never read are float32.
+SOA_DTYPES = {
+    'time': 'i8',    # candle open time, epoch milliseconds (UTC)
+    'open': 'f4',
+    'high': 'f8',
+    'low': 'f8',
+    'close': 'f4',
+    'volume': 'f4',
+}
+
+def empty_soa() -> Dict[str, np.ndarray]:
+    """Create an empty struct-of-arrays candle buffer"""
+    return {name: np.empty(0, dtype=dtype) for name, dtype in SOA_DTYPES.items()}
+
+def parse_candle_time(time_str: str) -> int:
+    """Convert a candle 'Time' string to epoch milliseconds"""
+    # Fixed-width format, so slice the fields instead of going through strptime
+    fields = (
+        int(time_str[0:4]), int(time_str[5:7]), int(time_str[8:10]),
+        int(time_str[11:13]), int(time_str[14:16]), int(time_str[17:19])
+    )
+    return calendar.timegm(fields) * 1000
+
+def format_candle_time(time_ms: int) -> str:
+    """Convert epoch milliseconds to the candle 'Time' string format"""
+    # time.gmtime avoids allocating a tz-aware datetime per call
+    return time.strftime(CANDLE_TIME_FORMAT, time.gmtime(time_ms // 1000))
+
+def format_candle_times(times_ms: np.ndarray) -> List[str]:
+    """Batch variant of format_candle_time for an int64 column of epoch milliseconds"""
+    # One vectorized datetime64 conversion instead of a gmtime/strftime call per value
+    iso_times = np.datetime_as_string(times_ms.astype('datetime64[ms]'), unit='s').tolist()
+    return [iso_time.replace('T', ' ') + ' UTC' for iso_time in iso_times]
+
+def candles_to_soa(candles: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Materialize a list of candle dicts into parallel NumPy columns.
+
+    The loader returns candles newest first; the columns are stored
+    oldest first so new candles can be appended at the tail.
+    """
+    chronological = candles[::-1]
+    count = len(chronological)
+    return {
+        'time': np.fromiter((parse_candle_time(c['Time']) for c in chronological), dtype=SOA_DTYPES['time'], count=count),
+        'open': np.fromiter((c['Open'] for c in chronological), dtype=SOA_DTYPES['open'], count=count),
+        'high': np.fromiter((c['High'] for c in chronological), dtype=SOA_DTYPES['high'], count=count),
+        'low': np.fromiter((c['Low'] for c in chronological), dtype=SOA_DTYPES['low'], count=count),
+        'close': np.fromiter((c['Close'] for c in chronological), dtype=SOA_DTYPES['close'], count=count),
+        'volume': np.fromiter((c['Volume'] for c in chronological), dtype=SOA_DTYPES['volume'], count=count),
+    }
+
+def klines_to_soa(klines: List[List[Any]]) -> Dict[str, np.ndarray]:
+    """
+    Build struct-of-arrays candle columns directly from raw Binance klines.
+    Klines arrive oldest first, matching the column order.
+    """
+    if not klines:
+        return empty_soa()
+
+    count = len(klines)
+    # Kline fields 1-5 are Open, High, Low, Close, Volume as decimal strings
+    ohlcv = np.array([kline[1:6] for kline in klines], dtype=np.float64)
+    soa = {'time': np.fromiter((kline[0] for kline in klines), dtype=SOA_DTYPES['time'], count=count)}
+    for column, name in enumerate(('open', 'high', 'low', 'close', 'volume')):
+        soa[name] = np.ascontiguousarray(ohlcv[:, column], dtype=SOA_DTYPES[name])
+    return soa
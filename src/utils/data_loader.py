@@ -1,126 +1,306 @@
-import csv
-from typing import List, Dict, Any, Optional, Tuple
-from pathlib import Path
-import pandas as pd
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+from types import MappingProxyType
 import numpy as np
 from binance.client import Client
-from binance.exceptions import BinanceAPIException
 import os
-from datetime import datetime, timedelta
+import time
+import threading
+import aiohttp
+import json
+import requests
 from dotenv import load_dotenv
 from src.utils.logger import setup_logger
-from datetime import timezone
+from src.utils.candles import klines_to_soa, empty_soa
+from src.utils.kline_cache import KlineFileCache
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson is optional; stdlib json parses the same payloads
+    json_loads = json.loads
 
 load_dotenv()
 logger = setup_logger('data_loader')
 
+BINANCE_API_URL = 'https://api.binance.com/api/v3'
+BINANCE_WS_URL = 'wss://stream.binance.com:9443/ws'
+# Candles per detection window
+CANDLE_LIMIT = 100
+
+# Timeframe string -> Binance kline interval; read-only so it can be shared freely
+TIMEFRAME_MAPPING = MappingProxyType({
+    'M1': Client.KLINE_INTERVAL_1MINUTE,
+    'M3': Client.KLINE_INTERVAL_3MINUTE,
+    'M5': Client.KLINE_INTERVAL_5MINUTE,
+    'M15': Client.KLINE_INTERVAL_15MINUTE,
+    'M30': Client.KLINE_INTERVAL_30MINUTE,
+    'H1': Client.KLINE_INTERVAL_1HOUR,
+    'H4': Client.KLINE_INTERVAL_4HOUR,
+    'D1': Client.KLINE_INTERVAL_1DAY,
+})
+
+# Candle length per timeframe, resolved once at import instead of per call
+TIMEFRAME_MINUTES = {
+    'M1': 1,
+    'M3': 3,
+    'M5': 5,
+    'M15': 15,
+    'M30': 30,
+    'H1': 60,
+    'H4': 4 * 60,
+    'D1': 24 * 60,
+}
+TIMEFRAME_CANDLE_MS = {timeframe: minutes * 60 * 1000 for timeframe, minutes in TIMEFRAME_MINUTES.items()}
+
+# Seconds between server clock re-syncs; the offset is shared by every loader in the process
+TIME_SYNC_INTERVAL = 30 * 60
+_time_offset_cache: Dict[str, float] = {}
+
 class BinanceDataLoader:
     def __init__(self):
         logger.debug("Initializing BinanceDataLoader")
-        # Initialize Binance client
+        # Credentials are still required, although only public endpoints are called
         api_key = os.getenv('BINANCE_API_KEY')
         api_secret = os.getenv('BINANCE_API_SECRET')
         
         if not api_key or not api_secret:
             raise ValueError("Please set BINANCE_API_KEY and BINANCE_API_SECRET environment variables")
         
-        self.client = Client(api_key, api_secret)
-        self.server_time_offset = self._get_time_offset()
-        
-        # Mapping for timeframe strings
-        self.timeframe_mapping = {
-            'M1': Client.KLINE_INTERVAL_1MINUTE,
-            'M3': Client.KLINE_INTERVAL_3MINUTE,
-            'M5': Client.KLINE_INTERVAL_5MINUTE,
-            'M15': Client.KLINE_INTERVAL_15MINUTE,
-            'M30': Client.KLINE_INTERVAL_30MINUTE,
-            'H1': Client.KLINE_INTERVAL_1HOUR,
-            'H4': Client.KLINE_INTERVAL_4HOUR,
-            'D1': Client.KLINE_INTERVAL_1DAY,
-        }
-
-        # Timeframe configurations
-        self.timeframe_config = {
-            'M1': {'candle_ms': 60 * 1000},
-            'M3': {'candle_ms': 3 * 60 * 1000},
-            'M5': {'candle_ms': 5 * 60 * 1000},
-            'M15': {'candle_ms': 15 * 60 * 1000},
-            'M30': {'candle_ms': 30 * 60 * 1000},
-            'H1': {'candle_ms': 60 * 60 * 1000},
-            'H4': {'candle_ms': 4 * 60 * 60 * 1000},
-            'D1': {'candle_ms': 24 * 60 * 60 * 1000},
-        }
+        # Keep-alive session for direct REST calls on the hot sync endpoints; the offset sync below uses it
+        self._http = requests.Session()
+        self.server_time_offset = 0
+        self._offset_synced_at = None
+        self._sync_time_offset()
+        # Pooled HTTP session for async endpoints, created inside the running event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Short-lived latest-price cache: symbol -> (price, monotonic fetch time)
+        self._price_cache = {}
+        self._price_ttl = 0.25
+        self._price_lock = threading.Lock()
+        # Closed klines persisted across restarts; only the tail is fetched live
+        self.kline_cache = KlineFileCache()
 
     def _get_time_offset(self) -> int:
         """Get the time offset between local and server time"""
-        server_time = self.client.get_server_time()
-        local_time = int(datetime.utcnow().timestamp() * 1000)
-        return server_time['serverTime'] - local_time
+        server_time = self._get_json('/time')
+        return server_time['serverTime'] - time.time_ns() // 1_000_000
+
+    def _time_offset_stale(self) -> bool:
+        return self._offset_synced_at is None or time.monotonic() - self._offset_synced_at >= TIME_SYNC_INTERVAL
+
+    def _adopt_shared_time_offset(self) -> bool:
+        """Reuse the offset another loader synced recently; returns False if it is missing or stale"""
+        if 'offset' not in _time_offset_cache or time.monotonic() - _time_offset_cache['synced_at'] >= TIME_SYNC_INTERVAL:
+            return False
+        self.server_time_offset = int(_time_offset_cache['offset'])
+        self._offset_synced_at = _time_offset_cache['synced_at']
+        return True
+
+    def _store_time_offset(self, offset: int):
+        self.server_time_offset = offset
+        self._offset_synced_at = time.monotonic()
+        _time_offset_cache.update(offset=offset, synced_at=self._offset_synced_at)
+
+    def _sync_time_offset(self):
+        """Refresh the server time offset if it is older than TIME_SYNC_INTERVAL"""
+        if not self._time_offset_stale() or self._adopt_shared_time_offset():
+            return
+        try:
+            self._store_time_offset(self._get_time_offset())
+        except Exception as e:
+            if self._offset_synced_at is None:
+                raise
+            logger.error(f"Error syncing server time: {str(e)}")
+
+    async def _sync_time_offset_async(self):
+        """Async variant of _sync_time_offset over the pooled session"""
+        if not self._time_offset_stale() or self._adopt_shared_time_offset():
+            return
+        try:
+            server_time = await self._get_json_async('/time')
+            self._store_time_offset(server_time['serverTime'] - time.time_ns() // 1_000_000)
+        except Exception as e:
+            logger.error(f"Error syncing server time: {str(e)}")
 
     def _get_current_server_time(self) -> int:
         """Get current server time in milliseconds"""
-        local_time = int(datetime.utcnow().timestamp() * 1000)
-        return local_time + self.server_time_offset
+        return time.time_ns() // 1_000_000 + self.server_time_offset
 
     def _get_last_forming_candle_time(self, timeframe: str) -> int:
         """Calculate the timestamp of the last completed candle"""
         server_time = self._get_current_server_time()
-        candle_ms = self.timeframe_config[timeframe]['candle_ms']
+        candle_ms = TIMEFRAME_CANDLE_MS[timeframe]
         
         # Round down to get the last completed candle
         last_completed_candle_ms = (server_time // candle_ms) * candle_ms
         
         return last_completed_candle_ms
 
-    def load_candles(self, symbol: str = 'BTCUSDT', timeframe: str = 'M15') -> List[Dict[str, Any]]:
-        """Load 200 candles ending at the last completed candle"""
+    def get_seconds_to_candle_close(self, timeframe: str) -> float:
+        """Calculate seconds until the currently forming candle closes"""
+        server_time = self._get_current_server_time()
+        candle_ms = TIMEFRAME_CANDLE_MS[timeframe]
+        next_close_ms = (server_time // candle_ms + 1) * candle_ms
+        return (next_close_ms - server_time) / 1000
+
+    def load_candles(self, symbol: str = 'BTCUSDT', timeframe: str = 'M15') -> Dict[str, np.ndarray]:
+        """
+        Load 200 candles ending at the last completed candle
+        Returns struct-of-arrays columns (time, open, high, low, close, volume), oldest first
+        """
         try:
-            interval = self.timeframe_mapping.get(timeframe)
-            if not interval:
-                raise ValueError(f"Invalid timeframe: {timeframe}")
-
-            # Get the current forming candle time
-            end_ts = self._get_last_forming_candle_time(timeframe)
-            
-            # Fetch klines from Binance
-            klines = self.client.get_historical_klines(
-                symbol=symbol,
-                interval=interval,
-                end_str=end_ts,
-                limit=100
-            )
+            # Timeframes are validated once by the caller (FVGMonitor.monitor_fvgs)
+            interval = TIMEFRAME_MAPPING[timeframe]
+
+            self._sync_time_offset()
+            end_ts, cached, start_ts = self._plan_kline_fetch(symbol, timeframe)
+
+            # Fetch only the klines after the cached run, up to and including the forming candle
+            params = {'symbol': symbol, 'interval': interval, 'startTime': start_ts, 'endTime': end_ts, 'limit': CANDLE_LIMIT}
+            fetched = self._get_json('/klines', params)
+            klines = self._merge_klines(symbol, timeframe, end_ts, cached, fetched)
+
+            return self._klines_to_soa(klines)
+
+        except Exception as e:
+            logger.error(f"Error fetching data: {str(e)}")
+            return empty_soa()
+
+    async def load_candles_async(self, symbol: str = 'BTCUSDT', timeframe: str = 'M15') -> Dict[str, np.ndarray]:
+        """Load the same candle window as load_candles over the pooled async session"""
+        try:
+            # Timeframes are validated once by the caller (FVGMonitor.monitor_fvgs)
+            interval = TIMEFRAME_MAPPING[timeframe]
 
-            if not klines:
-                return []
-
-            # Direct conversion to dictionary without DataFrame
-            # Process in reverse order (newest first) during creation
-            data = []
-            for kline in reversed(klines):
-                data.append({
-                    'Time': datetime.fromtimestamp(kline[0]/1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC'),
-                    'Open': float(kline[1]),
-                    'High': float(kline[2]),
-                    'Low': float(kline[3]),
-                    'Close': float(kline[4]),
-                    'Volume': float(kline[5])
-                })
-
-            logger.debug(f"Loaded {len(data)} candles")
-            return data
+            await self._sync_time_offset_async()
+            end_ts, cached, start_ts = self._plan_kline_fetch(symbol, timeframe)
+
+            params = {'symbol': symbol, 'interval': interval, 'startTime': start_ts, 'endTime': end_ts, 'limit': CANDLE_LIMIT}
+            fetched = await self._get_json_async('/klines', params)
+            klines = self._merge_klines(symbol, timeframe, end_ts, cached, fetched)
+
+            return self._klines_to_soa(klines)
 
         except Exception as e:
             logger.error(f"Error fetching data: {str(e)}")
-            return []
+            return empty_soa()
+
+    def _plan_kline_fetch(self, symbol: str, timeframe: str) -> Tuple[int, List[List[Any]], int]:
+        """
+        Split the candle window into the cached closed klines and the part to fetch live
+        Returns (forming candle open time, cached klines, fetch start time)
+        """
+        # Get the current forming candle time
+        end_ts = self._get_last_forming_candle_time(timeframe)
+        candle_ms = TIMEFRAME_CANDLE_MS[timeframe]
+        window_start = end_ts - (CANDLE_LIMIT - 1) * candle_ms
+
+        cached = self.kline_cache.get(symbol, timeframe, window_start, end_ts, candle_ms)
+        start_ts = cached[-1][0] + candle_ms if cached else window_start
+        return end_ts, cached, start_ts
+
+    def _merge_klines(self, symbol: str, timeframe: str, end_ts: int,
+                      cached: List[List[Any]], fetched: List[List[Any]]) -> List[List[Any]]:
+        """Store newly closed klines and join them onto the cached run"""
+        # The newest kline may still be forming on the exchange even when the local clock says
+        # it closed (see the 'new candle not published yet' retry), so it is never cached
+        self.kline_cache.put(symbol, timeframe, [kline for kline in fetched[:-1] if kline[0] < end_ts])
+        return cached + fetched
+
+    def _klines_to_soa(self, klines: List[List[Any]]) -> Dict[str, np.ndarray]:
+        """Convert raw Binance klines to candle columns without building per-candle dicts"""
+        candles_soa = klines_to_soa(klines)
+        logger.debug("Loaded %d candles", len(candles_soa['time']))
+        return candles_soa
+
+    def _get_cached_price(self, symbol: str) -> Optional[float]:
+        """Return the cached price for symbol if it is still within the TTL"""
+        with self._price_lock:
+            entry = self._price_cache.get(symbol)
+        if entry and time.monotonic() - entry[1] < self._price_ttl:
+            return entry[0]
+        return None
+
+    def _cache_price(self, symbol: str, price: float):
+        with self._price_lock:
+            self._price_cache[symbol] = (price, time.monotonic())
+
+    def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET a public Binance REST endpoint and decode the raw body"""
+        response = self._http.get(f"{BINANCE_API_URL}{path}", params=params, timeout=5)
+        response.raise_for_status()
+        return json_loads(response.content)
 
     def get_latest_price(self, symbol: str) -> float:
         """Get the latest price directly from Binance API"""
+        cached = self._get_cached_price(symbol)
+        if cached is not None:
+            return cached
         try:
-            ticker = self.client.get_symbol_ticker(symbol=symbol)
+            ticker = self._get_json('/ticker/price', {'symbol': symbol})
             price = float(ticker['price'])
-            logger.debug(f"Latest price for {symbol}: {price}")
+            logger.debug("Latest price for %s: %s", symbol, price)
+            self._cache_price(symbol, price)
             return price
         except Exception as e:
             logger.error(f"Error fetching price: {str(e)}", exc_info=True)
-            return None
\ No newline at end of file
+            return None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared keep-alive HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=5)
+            )
+        return self._session
+
+    async def _get_json_async(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Async variant of _get_json over the pooled session"""
+        session = self._get_session()
+        async with session.get(f"{BINANCE_API_URL}{path}", params=params) as response:
+            response.raise_for_status()
+            return json_loads(await response.read())
+
+    async def get_latest_price_async(self, symbol: str) -> float:
+        """Get the latest price from Binance API over the pooled async session"""
+        cached = self._get_cached_price(symbol)
+        if cached is not None:
+            return cached
+        try:
+            ticker = await self._get_json_async('/ticker/price', {'symbol': symbol})
+            price = float(ticker['price'])
+            logger.debug("Latest price for %s: %s", symbol, price)
+            self._cache_price(symbol, price)
+            return price
+        except Exception as e:
+            logger.error(f"Error fetching price: {str(e)}", exc_info=True)
+            return None
+
+    async def stream_klines(self, symbol: str, timeframe: str) -> AsyncIterator[Tuple[List[Any], bool]]:
+        """
+        Stream live klines from the Binance kline WebSocket over the pooled session
+        Yields (kline, closed) with the kline in the REST list layout; the candle is updated
+        in place roughly every 2 seconds and `closed` is True on its final update.
+        Returns when the server closes the stream.
+        """
+        url = f"{BINANCE_WS_URL}/{symbol.lower()}@kline_{TIMEFRAME_MAPPING[timeframe]}"
+        session = self._get_session()
+        async with session.ws_connect(url, heartbeat=60) as ws:
+            logger.debug(f"Kline stream connected: {url}")
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                k = json_loads(message.data)['k']
+                kline = [k['t'], k['o'], k['h'], k['l'], k['c'], k['v'], k['T'], k['q'], k['n'], k['V'], k['Q'], k['B']]
+                if k['x']:
+                    # Closed candles are final; keep the disk cache current without a REST call
+                    self.kline_cache.put(symbol, timeframe, [kline])
+                yield kline, k['x']
+        logger.debug(f"Kline stream closed: {url}")
+
+    async def close_session(self):
+        """Close the pooled async HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
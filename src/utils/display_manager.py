@@ -1,106 +1,216 @@
 from typing import List, Dict, Any, Tuple
+from operator import itemgetter
+from heapq import merge
 from blessed import Terminal
 import sys
-import pandas as pd
+import time
 from src.utils.logger import setup_logger
 logger = setup_logger('display_manager')
 
+# Sort keys on the integer timestamps; built once rather than per sort
+_BY_TIME = itemgetter('time_ms')
+_BY_MITIGATION_TIME = itemgetter('first_mitigation_time_ms')
+
 class DisplayManager:
+    # Direction markers
+    _UP = "▲"
+    _DN = "▼"
+    # Row layouts, formatted in one str.format call per row
+    _ACTIVE_ROW = "{idx:^4} {date:^12} {time:^10} {dir:^8} {gap:^30} {pct:^10} {mid:.1f}"
+    _MITIGATED_ROW = "{idx:^4} {date:^12} {time:^10} {mit_date:^12} {mit_time:^10} {dir:^6} {gap:^20} {hours:^8}"
+    # Lines every frame uses besides the FVG rows: header (2), each section's spacer,
+    # title bar, column header and rule (4 + 4), statistics (4) and footer (1)
+    _FIXED_LINES = 15
+
     def __init__(self):
         logger.debug("Initializing DisplayManager")
         self.term = Terminal()
+        # Escape sequences are fixed for the session, so resolve them once instead of per row
+        self._green = str(self.term.green)
+        self._red = str(self.term.red)
+        self._yellow = str(self.term.yellow)
+        self._bar = str(self.term.white_on_blue)
+        self._normal = str(self.term.normal)
+        self._clear_eol = str(self.term.clear_eol)
+        self._clear = str(self.term.clear)
+        # Width-dependent strings, rebuilt only when the terminal is resized
+        self._width = None
+        self._height = None
+        # Lines of the frame currently on screen; only lines that differ are rewritten
+        self._prev_lines: List[str] = []
+        # Inputs of the frame on screen, used to skip redundant rebuilds
+        self._header_sig = None
+        self._body_sig = None
+        self._body_fvgs = None
+        self._body_lines: List[str] = []
         
     def update_screen(self, 
                      symbol: str,
                      timeframe: str,
                      latest_price: float,
-                     last_update: str,
+                     last_update: int,
                      bullish_fvgs: List[Dict[str, Any]],
                      bearish_fvgs: List[Dict[str, Any]]):
-        logger.debug(f"Updating display for {symbol} {timeframe}")
+        logger.debug("Updating display for %s %s", symbol, timeframe)
         """Update the terminal display in place"""
-        # Clear screen and move to home position
-        sys.stdout.write(self.term.clear)
-        
+        # Query the terminal size once per frame (each size access is an ioctl)
+        resized = self._refresh_layout()
+
+        # The FVG sections depend only on the FVG lists, so they are rebuilt only when
+        # different (or resized) lists come in; price ticks just redo the header
+        header_sig = (symbol, timeframe, latest_price, last_update)
+        body_sig = (id(bullish_fvgs), id(bearish_fvgs), len(bullish_fvgs), len(bearish_fvgs))
+        if not resized and body_sig == self._body_sig:
+            if header_sig == self._header_sig:
+                return
+        else:
+            self._body_lines = self._build_body(bullish_fvgs, bearish_fvgs)
+            self._body_sig = body_sig
+            # Holding the lists keeps their ids from being reused while they are on screen
+            self._body_fvgs = (bullish_fvgs, bearish_fvgs)
+        self._header_sig = header_sig
+
         # Header with price info
-        self._write_header(symbol, timeframe, latest_price, last_update)
-        
+        lines = self._write_header(symbol, timeframe, latest_price, last_update) + self._body_lines
+
+        self._write_frame(lines[:self._height], full_redraw=resized)
+
+    def _build_body(self, bullish_fvgs: List[Dict[str, Any]], bearish_fvgs: List[Dict[str, Any]]) -> List[str]:
+        """Lines of every section below the header"""
         # Process FVGs
         active_bullish, active_bearish, mitigated_bullish, mitigated_bearish = self._categorize_fvgs(
             bullish_fvgs, bearish_fvgs
         )
+        active_rows, mitigated_rows = self._split_rows(
+            len(active_bullish) + len(active_bearish),
+            sum(1 for fvg in mitigated_bullish + mitigated_bearish if fvg.get('first_mitigation_time'))
+        )
         
         # Display Active FVGs
-        self._display_active_fvgs(active_bullish, active_bearish)
+        lines = self._display_active_fvgs(active_bullish, active_bearish, active_rows)
         
         # Display Mitigated FVGs
-        self._display_mitigated_fvgs(mitigated_bullish, mitigated_bearish)
+        lines += self._display_mitigated_fvgs(mitigated_bullish, mitigated_bearish, mitigated_rows)
         
         # Display Statistics
-        self._display_statistics(
+        lines += self._display_statistics(
             bullish_fvgs, bearish_fvgs,
             active_bullish, active_bearish
         )
         
         # Footer
-        self._write_footer()
-        
-        sys.stdout.flush()
-    
-    def _write_header(self, symbol: str, timeframe: str, latest_price: float, last_update: str):
-        sys.stdout.write(self.term.white_on_blue(f" FVG Monitor - {symbol} {timeframe} ".center(self.term.width)) + "\n")
-        sys.stdout.write(f"Price: {self.term.yellow(f'{latest_price:.2f}')} | Updated: {last_update}\n")
+        lines += self._write_footer()
+        return lines
     
+    def _split_rows(self, active_count: int, mitigated_count: int) -> Tuple[int, int]:
+        """
+        Share the screen rows left after the fixed lines between the two FVG tables,
+        so the statistics and footer always fit; each table gets at least half if it needs it
+        """
+        available = max(self._height - self._FIXED_LINES, 0)
+        # An empty active table still takes two lines for its "No active FVGs" message
+        active_needed = active_count or 2
+        active_rows = min(active_needed, max(available // 2, available - mitigated_count))
+        return active_rows, available - active_rows
+
+    def _write_frame(self, lines: List[str], full_redraw: bool = False):
+        """Rewrite only the lines that changed since the previous frame"""
+        out = []
+        prev_lines = self._prev_lines
+        if full_redraw:
+            # Clear screen and move to home position
+            out.append(self._clear)
+            prev_lines = []
+
+        line_starts = self._line_starts
+        for y, line in enumerate(lines):
+            if y >= len(prev_lines) or prev_lines[y] != line:
+                out.append(line_starts[y] + line)
+        # Blank out lines left over from a longer previous frame
+        for y in range(len(lines), len(prev_lines)):
+            out.append(line_starts[y])
+
+        self._prev_lines = lines
+        sys.stdout.write(''.join(out))
+        sys.stdout.flush()
+
+    def _refresh_layout(self) -> bool:
+        """Rebuild the width-dependent bars and rules if the terminal was resized; returns True if it was"""
+        width, height = self.term.width, self.term.height
+        if (width, height) == (self._width, self._height):
+            return False
+        self._width, self._height = width, height
+        self._rule = "-" * width
+        # Cursor-to-line-start plus clear-to-EOL prefix for every screen row
+        self._line_starts = [self.term.move_xy(0, y) + self._clear_eol for y in range(height)]
+        # Each section opens with a blank spacer line, then its title bar
+        self._active_bar = ["", self._bar + " Active FVGs ".ljust(width - 1) + self._normal]
+        self._mitigated_bar = ["", self._bar + " Recent Mitigations ".ljust(width - 1) + self._normal]
+        self._statistics_bar = ["", self._bar + " Statistics ".ljust(width - 1) + self._normal]
+        self._footer = self._bar + " Press Ctrl+C to exit ".center(width) + self._normal
+        return True
+
+    def _write_header(self, symbol: str, timeframe: str, latest_price: float, last_update: int) -> List[str]:
+        # last_update is a time.time_ns() stamp, formatted only here
+        last_update = time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(last_update // 1_000_000_000))
+        return [
+            self._bar + f" FVG Monitor - {symbol} {timeframe} ".center(self._width) + self._normal,
+            f"Price: {self._yellow}{latest_price:.2f}{self._normal} | Updated: {last_update}"
+        ]
     def _categorize_fvgs(self, bullish_fvgs: List[Dict[str, Any]], bearish_fvgs: List[Dict[str, Any]]):
         """Categorize FVGs into active and mitigated"""
         def split_fvgs(fvgs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
             active = []
             mitigated = []
             for fvg in fvgs:
-                if (fvg.get('status', '').lower() == 'unfilled' and 
-                    not any([fvg.get('first_mitigation_time'),
-                            fvg.get('mitigation_time'),
-                            fvg.get('time_to_mitigation')])):
-                    active.append(fvg)
-                else:
-                    mitigated.append(fvg)
-            return sorted(active, key=lambda x: x['time'], reverse=True), sorted(mitigated, key=lambda x: x['time'], reverse=True)
+                # Short-circuits on the status flag, which the mitigation detector always sets
+                is_mitigated = (fvg.get('status', '').lower() != 'unfilled' or
+                                fvg.get('first_mitigation_time') or
+                                fvg.get('mitigation_time') or
+                                fvg.get('time_to_mitigation'))
+                (mitigated if is_mitigated else active).append(fvg)
+            active.sort(key=_BY_TIME, reverse=True)
+            mitigated.sort(key=_BY_TIME, reverse=True)
+            return active, mitigated
         
         active_bullish, mitigated_bullish = split_fvgs(bullish_fvgs)
         active_bearish, mitigated_bearish = split_fvgs(bearish_fvgs)
         
         return active_bullish, active_bearish, mitigated_bullish, mitigated_bearish
     
-    def _display_active_fvgs(self, active_bullish: List[Dict[str, Any]], active_bearish: List[Dict[str, Any]]):
-        sys.stdout.write(self.term.white_on_blue("\n Active FVGs ".ljust(self.term.width)) + "\n")
-        sys.stdout.write(f"{'#':^4} {'Date':^12} {'Time (UTC)':^10} {'Type':^8} {'Gap Range':^30} {'Gap %':^10} {'Middle':^12}\n")
-        sys.stdout.write("-" * self.term.width + "\n")
+    def _display_active_fvgs(self, active_bullish: List[Dict[str, Any]], active_bearish: List[Dict[str, Any]],
+                             max_rows: int) -> List[str]:
+        lines = self._active_bar + [
+            f"{'#':^4} {'Date':^12} {'Time (UTC)':^10} {'Type':^8} {'Gap Range':^30} {'Gap %':^10} {'Middle':^12}",
+            self._rule
+        ]
         
-        # Sort by timestamp ascending (newest to oldest)
-        all_active = sorted(active_bullish + active_bearish, key=lambda x: x['time'], reverse=True)
+        # Both sides arrive sorted newest to oldest from _categorize_fvgs, so a linear merge suffices
+        # Only the newest rows that fit on screen are drawn
+        all_active = list(merge(active_bullish, active_bearish, key=_BY_TIME, reverse=True))[:max_rows]
         
         if all_active:
             for idx, fvg in enumerate(all_active, 1):  # Start counting from 1
-                is_bullish = fvg in active_bullish
-                color = self.term.green if is_bullish else self.term.red
-                direction = "▲" if is_bullish else "▼"
-                date_str = fvg['time'].split()[0]
-                time_str = fvg['time'].split()[1]
+                is_bullish = fvg['type'] == 'bullish'
+                color = self._green if is_bullish else self._red
+                direction = self._UP if is_bullish else self._DN
                 
-                sys.stdout.write(color(
-                    f"{idx:^4} "  # Add numerical index
-                    f"{date_str:^12} "
-                    f"{time_str:^10} "
-                    f"{direction:^8} "
-                    f"{f'{fvg['gap_low']:.1f} - {fvg['gap_high']:.1f}':^30} "
-                    f"{f'{fvg['gap_percentage']:.2f}%':^10} "
-                    f"{fvg['middle_price']:.1f}".center(12) + "\n"
-                ))
-        else:
-            sys.stdout.write("\nNo active FVGs\n")
+                lines.append(color + self._ACTIVE_ROW.format(
+                    idx=idx,  # Add numerical index
+                    date=fvg['_date'],
+                    time=fvg['_time'],
+                    dir=direction,
+                    gap=f"{fvg['gap_low']:.1f} - {fvg['gap_high']:.1f}",
+                    pct=f"{fvg['gap_percentage']:.2f}%",
+                    mid=fvg['middle_price']
+                ) + self._normal)
+        elif not active_bullish and not active_bearish:
+            lines += ["", "No active FVGs"][:max_rows]
+        return lines
     
-    def _display_mitigated_fvgs(self, mitigated_bullish: List[Dict[str, Any]], mitigated_bearish: List[Dict[str, Any]]):
-        sys.stdout.write(self.term.white_on_blue("\n Recent Mitigations ".ljust(self.term.width)) + "\n")
+    def _display_mitigated_fvgs(self, mitigated_bullish: List[Dict[str, Any]], mitigated_bearish: List[Dict[str, Any]],
+                                max_rows: int) -> List[str]:
+        lines = list(self._mitigated_bar)
         
         # Column headers with adjusted widths
         headers = (
@@ -113,8 +223,7 @@ class DisplayManager:
             f"{'Gap Range':^20} "
             f"{'Hours':^8}"
         )
-        sys.stdout.write(headers + "\n")
-        sys.stdout.write("-" * self.term.width + "\n")
+        lines += [headers, self._rule]
         
         all_mitigated = []
         for fvg in mitigated_bullish + mitigated_bearish:
@@ -122,41 +231,37 @@ class DisplayManager:
                 all_mitigated.append(fvg)
         
         # Sort by mitigation time ascending (newest to oldest)
-        all_mitigated.sort(key=lambda x: x['first_mitigation_time'], reverse=True)
+        all_mitigated.sort(key=_BY_MITIGATION_TIME, reverse=True)
         
-        for idx, fvg in enumerate(all_mitigated, 1):  # Start counting from 1
-            is_bullish = fvg in mitigated_bullish
-            color = self.term.green if is_bullish else self.term.red
-            direction = "▲" if is_bullish else "▼"
-            form_date = fvg['time'].split()[0]
-            form_time = fvg['time'].split()[1]
-            mit_date = fvg['first_mitigation_time'].split()[0]
-            mit_time = fvg['first_mitigation_time'].split()[1]
+        for idx, fvg in enumerate(all_mitigated[:max_rows], 1):  # Start counting from 1
+            is_bullish = fvg['type'] == 'bullish'
+            color = self._green if is_bullish else self._red
+            direction = self._UP if is_bullish else self._DN
             time_to_mit = f"{fvg['time_to_mitigation']:.2f}" if fvg.get('time_to_mitigation') else "N/A"
             
             # Format each row with consistent spacing
-            row = (
-                f"{idx:^4} "
-                f"{form_date:^12} "
-                f"{form_time:^10} "
-                f"{mit_date:^12} "
-                f"{mit_time:^10} "
-                f"{direction:^6} "
-                f"{f'{fvg['gap_low']:.1f}-{fvg['gap_high']:.1f}':^20} "
-                f"{time_to_mit:^8}"
+            row = self._MITIGATED_ROW.format(
+                idx=idx,
+                date=fvg['_date'],
+                time=fvg['_time'],
+                mit_date=fvg['_mit_date'],
+                mit_time=fvg['_mit_time'],
+                dir=direction,
+                gap=f"{fvg['gap_low']:.1f}-{fvg['gap_high']:.1f}",
+                hours=time_to_mit
             )
-            sys.stdout.write(color(row + "\n"))
+            lines.append(color + row + self._normal)
+        return lines
     
     def _display_statistics(self, bullish_fvgs: List[Dict[str, Any]], bearish_fvgs: List[Dict[str, Any]],
-                          active_bullish: List[Dict[str, Any]], active_bearish: List[Dict[str, Any]]):
-        sys.stdout.write(self.term.white_on_blue("\n Statistics ".ljust(self.term.width)) + "\n")
+                          active_bullish: List[Dict[str, Any]], active_bearish: List[Dict[str, Any]]) -> List[str]:
         total_fvgs = len(bullish_fvgs) + len(bearish_fvgs)
         stats_line = (
             f"Total FVGs: {total_fvgs} | "
             f"Bullish: {len(bullish_fvgs)} ({len(active_bullish)} active) | "
             f"Bearish: {len(bearish_fvgs)} ({len(active_bearish)} active)"
         )
-        sys.stdout.write(stats_line + "\n\n")
+        return self._statistics_bar + [stats_line, ""]
     
-    def _write_footer(self):
-        sys.stdout.write(self.term.white_on_blue(" Press Ctrl+C to exit ".center(self.term.width))) 
\ No newline at end of file
+    def _write_footer(self) -> List[str]:
+        return [self._footer] 
\ No newline at end of file
@@ -1,6 +1,12 @@
 from typing import List, Dict, Any, Tuple
-import pandas as pd
+import numpy as np
 from datetime import datetime
+from src.utils.candles import candles_to_soa
+from src.utils.fvg_set import FVGSet
+from src.utils.fvg_detector_kernels import detect_fvg_indices, detect_fvg_masks_batch
+
+# Columns of the table built by FVGDetector._statistics_columns
+_MIDDLE, _GAP_SIZE, _GAP_PCT, _MITIGATED, _HOURS = range(5)
 
 class FVGDetector:
     def __init__(self, candles: List[Dict[str, Any]]):
@@ -8,112 +14,161 @@ class FVGDetector:
         Initialize FVG detector with candlestick data
         :param candles: List of candlestick data dictionaries with Time, Open, High, Low, Close
         """
-        self.candles = candles
+        self._reset()
+        self.update(candles_to_soa(candles))
 
-    def detect_fvgs_only(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    @classmethod
+    def from_soa(cls, candles_soa: Dict[str, np.ndarray]) -> 'FVGDetector':
+        """
+        Create a detector directly from struct-of-arrays candle columns
+        :param candles_soa: Dict of parallel arrays (time, open, high, low, close, volume), oldest first
+        """
+        detector = cls.__new__(cls)
+        detector._reset()
+        detector.update(candles_soa)
+        return detector
+
+    @classmethod
+    def detect_many(cls, candles_by_symbol: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """
+        Detect FVGs for several instruments in one batched kernel pass
+        :param candles_by_symbol: Dict of symbol -> struct-of-arrays candle columns, oldest first
+        :return: Dict of symbol -> (bullish_fvgs, bearish_fvgs)
+        """
+        detectors = {symbol: cls.from_soa(soa) for symbol, soa in candles_by_symbol.items()}
+
+        # Windows of equal length are stacked and scanned together
+        by_length = {}
+        for symbol, detector in detectors.items():
+            if len(detector.time) >= 3:
+                by_length.setdefault(len(detector.time), []).append(symbol)
+
+        for length, symbols in by_length.items():
+            high = np.stack([detectors[symbol].high for symbol in symbols])
+            low = np.stack([detectors[symbol].low for symbol in symbols])
+            bullish_mask, bearish_mask = detect_fvg_masks_batch(high, low)
+            for row, symbol in enumerate(symbols):
+                detector = detectors[symbol]
+                detector._bullish_idx = np.flatnonzero(bullish_mask[row])
+                detector._bearish_idx = np.flatnonzero(bearish_mask[row])
+                detector._scanned = length - 2
+
+        return {symbol: detector.detect_fvgs_only() for symbol, detector in detectors.items()}
+
+    def _reset(self):
+        """Clear the candle columns and all incremental scan state"""
+        self.time = None
+        self.high = None
+        self.low = None
+        self._reset_scan()
+
+    def _reset_scan(self):
+        # 1st-candle indices of the gaps found so far and the next window start to scan
+        self._bullish_idx = np.empty(0, dtype=np.int64)
+        self._bearish_idx = np.empty(0, dtype=np.int64)
+        self._scanned = 0
+
+    def update(self, candles_soa: Dict[str, np.ndarray]):
+        """
+        Point the detector at new candle columns without reallocating them.
+        When the new window overlaps the previous one, gaps already found in the
+        overlap are kept so only the new tail needs scanning.
+        """
+        old_time = self.time
+        self.time = candles_soa['time']
+        self.high = candles_soa['high']
+        self.low = candles_soa['low']
+
+        if old_time is None or not len(old_time) or not len(self.time):
+            self._reset_scan()
+            return
+
+        # Number of old candles that slid out of the front of the window
+        shift = int(np.searchsorted(old_time, self.time[0]))
+        overlap = len(old_time) - shift
+        if (overlap <= 0 or overlap > len(self.time)
+                or not np.array_equal(old_time[shift:], self.time[:overlap])):
+            self._reset_scan()
+            return
+
+        # The newest old candle may have still been forming, so rescan every window that includes it
+        self._scanned = max(min(self._scanned - shift, overlap - 3), 0)
+        self._bullish_idx = self._bullish_idx - shift
+        self._bearish_idx = self._bearish_idx - shift
+        self._bullish_idx = self._bullish_idx[(self._bullish_idx >= 0) & (self._bullish_idx < self._scanned)]
+        self._bearish_idx = self._bearish_idx[(self._bearish_idx >= 0) & (self._bearish_idx < self._scanned)]
+
+    def detect_fvg_sets(self) -> Tuple[FVGSet, FVGSet]:
         """
         Detect both bullish and bearish Fair Value Gaps (FVGs) without mitigation check
-        Returns two lists of FVGs with their properties
+        Returns one struct-of-arrays FVGSet per direction, newest to oldest
         """
-        if len(self.candles) < 3:
-            return [], []
-
-        bullish_fvgs = []
-        bearish_fvgs = []
-
-        # Iterate through candles in reverse (newest to oldest)
-        for i in range(len(self.candles) - 2):
-            try:
-                fvg = self._check_fvg_pattern(i)
-                if fvg:
-                    if fvg['type'] == 'bullish':
-                        bullish_fvgs.append(fvg)
-                    else:
-                        bearish_fvgs.append(fvg)
-            except IndexError and KeyError and TypeError as e:
-                print(f"Error checking FVG pattern: {str(e)}")
-                # Safety check in case we hit the end of the list
-                break
-
-        return bullish_fvgs, bearish_fvgs
-
-    def _check_fvg_pattern(self, start_idx: int) -> Dict[str, Any]:
+        if len(self.time) < 3:
+            empty = np.empty(0, dtype=np.int64)
+            return (FVGSet.from_indices('bullish', empty, self.time, self.high, self.low),
+                    FVGSet.from_indices('bearish', empty, self.time, self.high, self.low))
+
+        # Scan only the candle windows not covered by a previous call
+        if self._scanned < len(self.time) - 2:
+            new_bullish, new_bearish = detect_fvg_indices(self.high, self.low, self._scanned)
+            self._bullish_idx = np.concatenate((self._bullish_idx, new_bullish))
+            self._bearish_idx = np.concatenate((self._bearish_idx, new_bearish))
+            self._scanned = len(self.time) - 2
+
+        # Gap bounds for all hits are gathered with fancy indexing, newest to oldest
+        return (FVGSet.from_indices('bullish', self._bullish_idx[::-1], self.time, self.high, self.low),
+                FVGSet.from_indices('bearish', self._bearish_idx[::-1], self.time, self.high, self.low))
+
+    def detect_fvgs_only(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
-        Check for FVG pattern at given index
-        Returns FVG properties if found, None otherwise
+        Detect both bullish and bearish Fair Value Gaps (FVGs) without mitigation check
+        Returns two lists of FVGs with their properties
         """
-        third_candle = self.candles[start_idx]
-        middle_candle = self.candles[start_idx + 1]
-        first_candle = self.candles[start_idx + 2]
-
-        # Check for bearish FVG (3rd candle's high < 1st candle's low)
-        if third_candle['High'] < first_candle['Low']:
-            gap_size = first_candle['Low'] - third_candle['High']
-            gap_pct = (gap_size / third_candle['High']) * 100
-            
-            return {
-                'type': 'bearish',
-                'time': middle_candle['Time'],
-                'gap_high': first_candle['Low'],
-                'gap_low': third_candle['High'],
-                'gap_size': gap_size,
-                'gap_percentage': gap_pct,
-                'middle_price': (first_candle['Low'] + third_candle['High']) / 2,
-                'status': 'unfilled',
-                'mitigation_time': None,
-                'mitigation_price': None,
-                'time_to_mitigation': None,
-                'index': start_idx + 1
-            }
-
-        # Check for bullish FVG (3rd candle's low > 1st candle's high)
-        if third_candle['Low'] > first_candle['High']:
-            gap_size = third_candle['Low'] - first_candle['High']
-            gap_pct = (gap_size / first_candle['High']) * 100
-            
-            return {
-                'type': 'bullish',
-                'time': middle_candle['Time'],
-                'gap_low': first_candle['High'],
-                'gap_high': third_candle['Low'],
-                'gap_size': gap_size,
-                'gap_percentage': gap_pct,
-                'middle_price': (third_candle['Low'] + first_candle['High']) / 2,
-                'status': 'unfilled',
-                'mitigation_time': None,
-                'mitigation_price': None,
-                'time_to_mitigation': None,
-                'index': start_idx + 1
-            }
-        
-        return None
+        bullish_set, bearish_set = self.detect_fvg_sets()
+        return bullish_set.to_dicts(), bearish_set.to_dicts()
+
+    @staticmethod
+    def _statistics_columns(fvgs: List[Dict[str, Any]]) -> np.ndarray:
+        """Gather the fields get_fvg_statistics aggregates into an (n, 5) float64 table"""
+        rows = [
+            (
+                (fvg['gap_high'] + fvg['gap_low']) / 2,
+                fvg['gap_size'],
+                fvg['gap_percentage'],
+                fvg['status'] == 'mitigated',
+                fvg['time_to_mitigation'] or 0.0
+            )
+            for fvg in fvgs
+        ]
+        return np.array(rows, dtype=np.float64).reshape(len(rows), 5)
 
     def get_fvg_statistics(self, bullish_fvgs: List[Dict[str, Any]], bearish_fvgs: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Calculate statistics for detected FVGs including mitigation statistics
         """
         total_fvgs = len(bullish_fvgs) + len(bearish_fvgs)
-        
+
+        # One pass per side into a column table, then the aggregates run in NumPy
+        bullish = self._statistics_columns(bullish_fvgs)
+        bearish = self._statistics_columns(bearish_fvgs)
+
         # Calculate middle prices
-        bullish_middles = [(fvg['gap_high'] + fvg['gap_low']) / 2 for fvg in bullish_fvgs]
-        bearish_middles = [(fvg['gap_high'] + fvg['gap_low']) / 2 for fvg in bearish_fvgs]
-        
-        avg_bullish_middle = sum(bullish_middles) / len(bullish_fvgs) if bullish_fvgs else 0
-        avg_bearish_middle = sum(bearish_middles) / len(bearish_fvgs) if bearish_fvgs else 0
-        
+        avg_bullish_middle = float(bullish[:, _MIDDLE].mean()) if bullish_fvgs else 0
+        avg_bearish_middle = float(bearish[:, _MIDDLE].mean()) if bearish_fvgs else 0
+
         # Basic statistics
-        avg_bullish_gap = sum(fvg['gap_size'] for fvg in bullish_fvgs) / len(bullish_fvgs) if bullish_fvgs else 0
-        avg_bearish_gap = sum(fvg['gap_size'] for fvg in bearish_fvgs) / len(bearish_fvgs) if bearish_fvgs else 0
-        avg_bullish_pct = sum(fvg['gap_percentage'] for fvg in bullish_fvgs) / len(bullish_fvgs) if bullish_fvgs else 0
-        avg_bearish_pct = sum(fvg['gap_percentage'] for fvg in bearish_fvgs) / len(bearish_fvgs) if bearish_fvgs else 0
+        avg_bullish_gap = float(bullish[:, _GAP_SIZE].mean()) if bullish_fvgs else 0
+        avg_bearish_gap = float(bearish[:, _GAP_SIZE].mean()) if bearish_fvgs else 0
+        avg_bullish_pct = float(bullish[:, _GAP_PCT].mean()) if bullish_fvgs else 0
+        avg_bearish_pct = float(bearish[:, _GAP_PCT].mean()) if bearish_fvgs else 0
 
         # Mitigation statistics
-        mitigated_bullish = sum(1 for fvg in bullish_fvgs if fvg['status'] == 'mitigated')
-        mitigated_bearish = sum(1 for fvg in bearish_fvgs if fvg['status'] == 'mitigated')
-        
+        mitigated_bullish = int(bullish[:, _MITIGATED].sum())
+        mitigated_bearish = int(bearish[:, _MITIGATED].sum())
+
         # Average time to mitigation (in hours)
-        avg_bullish_time = sum(fvg['time_to_mitigation'] for fvg in bullish_fvgs if fvg['time_to_mitigation']) / mitigated_bullish if mitigated_bullish else 0
-        avg_bearish_time = sum(fvg['time_to_mitigation'] for fvg in bearish_fvgs if fvg['time_to_mitigation']) / mitigated_bearish if mitigated_bearish else 0
+        avg_bullish_time = float(bullish[:, _HOURS].sum()) / mitigated_bullish if mitigated_bullish else 0
+        avg_bearish_time = float(bearish[:, _HOURS].sum()) / mitigated_bearish if mitigated_bearish else 0
 
         return {
             'total_fvgs': total_fvgs,
@@ -125,7 +180,7 @@ class FVGDetector:
             'avg_bearish_gap_percentage': avg_bearish_pct,
             'avg_bullish_middle': avg_bullish_middle,
             'avg_bearish_middle': avg_bearish_middle,
-            'total_candles': len(self.candles),
+            'total_candles': len(self.time),
             # Mitigation statistics
             'mitigated_bullish': mitigated_bullish,
             'mitigated_bearish': mitigated_bearish,
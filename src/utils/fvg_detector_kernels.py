@@ -0,0 +1,76 @@
+from typing import Tuple
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; fall back to vectorized NumPy
+    njit = None
+    prange = range
+
+def _detect_fvg_indices_loop(high: np.ndarray, low: np.ndarray, start: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Three-candle FVG scan over oldest-first High/Low columns.
+    Only windows whose 1st candle is at or after `start` are checked.
+    Returns the index of the 1st candle of every bullish and bearish gap.
+    """
+    n = high.shape[0]
+    size = max(n - 2 - start, 0)
+    bullish = np.empty(size, dtype=np.int64)
+    bearish = np.empty(size, dtype=np.int64)
+    bull_count = 0
+    bear_count = 0
+
+    for i in range(start + 2, n):
+        # Bearish FVG: 3rd candle's high < 1st candle's low
+        if high[i] < low[i - 2]:
+            bearish[bear_count] = i - 2
+            bear_count += 1
+        # Bullish FVG: 3rd candle's low > 1st candle's high
+        elif low[i] > high[i - 2]:
+            bullish[bull_count] = i - 2
+            bull_count += 1
+
+    return bullish[:bull_count], bearish[:bear_count]
+
+def _detect_fvg_indices_numpy(high: np.ndarray, low: np.ndarray, start: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized equivalent of the loop kernel, used when Numba is not installed"""
+    if high.shape[0] - start < 3:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    high, low = high[start:], low[start:]
+    bullish = np.flatnonzero(low[2:] > high[:-2]) + start
+    bearish = np.flatnonzero(high[2:] < low[:-2]) + start
+    return bullish, bearish
+
+def _detect_fvg_masks_batch_loop(high: np.ndarray, low: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Batched FVG scan over stacked (n_symbols, n_candles) High/Low columns, one row per symbol.
+    Returns boolean masks flagging the 1st candle of every bullish and bearish gap.
+    """
+    n_symbols, n = high.shape
+    bullish = np.zeros((n_symbols, max(n - 2, 0)), dtype=np.bool_)
+    bearish = np.zeros((n_symbols, max(n - 2, 0)), dtype=np.bool_)
+
+    # Symbols are independent, so rows are spread across cores
+    for s in prange(n_symbols):
+        for i in range(2, n):
+            if high[s, i] < low[s, i - 2]:
+                bearish[s, i - 2] = True
+            elif low[s, i] > high[s, i - 2]:
+                bullish[s, i - 2] = True
+
+    return bullish, bearish
+
+def _detect_fvg_masks_batch_numpy(high: np.ndarray, low: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized equivalent of the batched loop kernel, used when Numba is not installed"""
+    bullish = low[:, 2:] > high[:, :-2]
+    bearish = high[:, 2:] < low[:, :-2]
+    return bullish, bearish
+
+if njit is not None:
+    # cache=True persists the compiled kernel to disk so later runs skip the compile
+    detect_fvg_indices = njit(cache=True, fastmath=True)(_detect_fvg_indices_loop)
+    detect_fvg_masks_batch = njit(cache=True, fastmath=True, parallel=True)(_detect_fvg_masks_batch_loop)
+else:
+    detect_fvg_indices = _detect_fvg_indices_numpy
+    detect_fvg_masks_batch = _detect_fvg_masks_batch_numpy
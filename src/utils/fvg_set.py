@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from typing import List, Dict, Any
+import numpy as np
+from src.utils.candles import format_candle_times
+
+@dataclass
+class FVGSet:
+    """
+    Struct-of-arrays storage for FVGs of one direction, one array element per gap.
+    Row order follows the indices it was built from (newest first from FVGDetector).
+    """
+    type: str                   # 'bullish' or 'bearish'
+    time_ms: np.ndarray         # middle candle open time, epoch milliseconds (i8)
+    gap_high: np.ndarray        # f8
+    gap_low: np.ndarray         # f8
+    gap_size: np.ndarray        # f8
+    gap_percentage: np.ndarray  # f8
+    middle_price: np.ndarray    # f8
+    index: np.ndarray           # middle candle index counted from the newest candle, 0 = newest (i8)
+
+    @classmethod
+    def from_indices(cls, fvg_type: str, first_idx: np.ndarray, time: np.ndarray,
+                     high: np.ndarray, low: np.ndarray) -> 'FVGSet':
+        """
+        Gather the gaps whose 1st candle sits at first_idx from oldest-first candle columns
+        :param fvg_type: 'bullish' or 'bearish'
+        """
+        third_idx = first_idx + 2
+        if fvg_type == 'bearish':
+            # Gap between the 3rd candle's high and the 1st candle's low
+            gap_high, gap_low = low[first_idx], high[third_idx]
+        else:
+            # Gap between the 1st candle's high and the 3rd candle's low
+            gap_high, gap_low = low[third_idx], high[first_idx]
+        gap_size = gap_high - gap_low
+
+        return cls(
+            type=fvg_type,
+            time_ms=time[first_idx + 1],
+            gap_high=gap_high,
+            gap_low=gap_low,
+            gap_size=gap_size,
+            gap_percentage=gap_size / gap_low * 100,
+            middle_price=(gap_high + gap_low) / 2,
+            # Newest-first position, as when candles were held as a newest-first list
+            index=len(time) - 2 - first_idx
+        )
+
+    def __len__(self) -> int:
+        return len(self.time_ms)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        """Legacy dict view of one gap"""
+        return self._to_dict(
+            format_candle_times(self.time_ms[i:i + 1])[0], int(self.time_ms[i]),
+            float(self.gap_high[i]), float(self.gap_low[i]), float(self.gap_size[i]),
+            float(self.gap_percentage[i]), float(self.middle_price[i]), int(self.index[i])
+        )
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Legacy list-of-dicts view, as returned by FVGDetector.detect_fvgs_only"""
+        # .tolist() converts each column to Python scalars in one C pass
+        return [
+            self._to_dict(*row) for row in zip(
+                format_candle_times(self.time_ms), self.time_ms.tolist(),
+                self.gap_high.tolist(), self.gap_low.tolist(), self.gap_size.tolist(),
+                self.gap_percentage.tolist(), self.middle_price.tolist(), self.index.tolist()
+            )
+        ]
+
+    def _to_dict(self, time: str, time_ms: int, gap_high: float, gap_low: float, gap_size: float,
+                 gap_percentage: float, middle_price: float, index: int) -> Dict[str, Any]:
+        return {
+            'type': self.type,
+            'time': time,
+            'time_ms': time_ms,
+            # Display columns, split once here instead of on every render
+            '_date': time[:10],
+            '_time': time[11:19],
+            'gap_high': gap_high,
+            'gap_low': gap_low,
+            'gap_size': gap_size,
+            'gap_percentage': gap_percentage,
+            'middle_price': middle_price,
+            'status': 'unfilled',
+            'mitigation_time': None,
+            'mitigation_price': None,
+            'time_to_mitigation': None,
+            'index': index
+        }
@@ -0,0 +1,72 @@
+import json
+import os
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+from src.utils.logger import setup_logger
+
+logger = setup_logger('kline_cache')
+
+class KlineFileCache:
+    """
+    On-disk cache of closed Binance klines, one JSON file per (symbol, timeframe).
+
+    A kline never changes once its candle has closed, so cached entries have no TTL;
+    the forming candle is never stored and is always fetched live.
+    """
+
+    def __init__(self, cache_dir: Path = None, max_klines: int = 1000):
+        self.cache_dir = cache_dir or Path(__file__).parent.parent.parent / '.cache' / 'binance'
+        self.max_klines = max_klines
+        # In-memory copy so the file is only read once per key
+        self._klines: Dict[Tuple[str, str], List[List[Any]]] = {}
+
+    def _path(self, symbol: str, timeframe: str) -> Path:
+        return self.cache_dir / f"{symbol}_{timeframe}.json"
+
+    def _load(self, symbol: str, timeframe: str) -> List[List[Any]]:
+        key = (symbol, timeframe)
+        if key not in self._klines:
+            try:
+                with open(self._path(symbol, timeframe)) as f:
+                    self._klines[key] = json.load(f)
+            except FileNotFoundError:
+                self._klines[key] = []
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable kline cache for {symbol} {timeframe}: {str(e)}")
+                self._klines[key] = []
+        return self._klines[key]
+
+    def get(self, symbol: str, timeframe: str, start_ms: int, end_ms: int, candle_ms: int) -> List[List[Any]]:
+        """
+        Return cached klines with start_ms <= open time < end_ms, oldest first.
+        Returns an empty list unless the cached run starts exactly at start_ms, and cuts the
+        run at the first missing candle (open times must advance by exactly candle_ms),
+        so callers only ever need to fetch the tail after the last cached kline.
+        """
+        klines = [kline for kline in self._load(symbol, timeframe) if start_ms <= kline[0] < end_ms]
+        if not klines or klines[0][0] != start_ms:
+            return []
+        for i in range(1, len(klines)):
+            if klines[i][0] != klines[i - 1][0] + candle_ms:
+                return klines[:i]
+        return klines
+
+    def put(self, symbol: str, timeframe: str, klines: List[List[Any]]):
+        """Merge closed klines into the cache and persist it"""
+        if not klines:
+            return
+        merged = {kline[0]: kline for kline in self._load(symbol, timeframe)}
+        merged.update((kline[0], kline) for kline in klines)
+        cached = [merged[open_ms] for open_ms in sorted(merged)][-self.max_klines:]
+        self._klines[(symbol, timeframe)] = cached
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(symbol, timeframe)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(cached, f)
+            # Atomic swap so a crash mid-write never leaves a truncated cache
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist kline cache for {symbol} {timeframe}: {str(e)}")
@@ -4,6 +4,7 @@ from datetime import datetime, timezone, timedelta
 import asyncio
 import json
 import os
+import time
 from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
 from binance.exceptions import BinanceAPIException
@@ -11,11 +12,35 @@ import numpy as np
 from logger import setup_logger
 from dotenv import load_dotenv
 from collections import defaultdict
+from trade_columns import TradeColumns
+from candles import format_candle_time
+
+try:
+    import orjson
+    json_dumps = orjson.dumps
+except ImportError:  # orjson is optional; stdlib json writes the same compact document
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+try:
+    from sortedcontainers import SortedDict
+except ImportError:  # sortedcontainers is optional; price levels are sorted per summary instead
+    SortedDict = dict
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional (and not available on Windows); stock asyncio runs the same code
+    uvloop = None
 
 # Load environment variables
 load_dotenv()
 logger = setup_logger('liquidity_analyzer')
 
+# Stream housekeeping runs once per interval for the whole batch of messages received in it
+SAVE_INTERVAL = 1.0      # Seconds between progress logs and market data snapshots
+CLEANUP_INTERVAL = 60.0  # Seconds between evictions of trades older than cleanup_threshold
+DAY_MS = 24 * 60 * 60 * 1000
+
 class MarketDataAnalyzer:
     def __init__(self):
         """Initialize analyzer with data structures"""
@@ -33,21 +58,48 @@ class MarketDataAnalyzer:
         
         # Initialize data structures
         self.trade_history = {
-            'bids': defaultdict(list),  # Price -> List of trade data
-            'asks': defaultdict(list)
+            'bids': TradeColumns(),  # Columns of price, quantity, timestamp_ms, trade_id
+            'asks': TradeColumns()
         }
         self.order_filled = {
             'bids': defaultdict(dict),
             'asks': defaultdict(dict)
         }
         self.orderbook = {
-            'bids': {},  # Price -> Quantity
-            'asks': {}
+            'bids': SortedDict(),  # Price -> Quantity, kept in ascending price order
+            'asks': SortedDict()
         }
         self.historical_data_loaded = False
         self.last_update_id = None
         self.cleanup_threshold = timedelta(hours=24)
-        self.message_counter = 0
+        # Time of the newest trade seen, epoch milliseconds
+        self.latest_trade_ts_ms = None
+        # Append-only NDJSON log of every trade received, opened by start_market_stream
+        self._trade_log = None
+        
+    def _open_trade_log(self, symbol: str):
+        """Open the append-only trade log for symbol, one JSON object per line"""
+        if self._trade_log is None:
+            filename = f'data/trades_{symbol.lower()}.ndjson'
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            self._trade_log = open(filename, 'ab')
+            
+    def _log_trade(self, side: str, price: float, quantity: float, timestamp_ms: int, trade_id: int):
+        """Append one trade to the trade log (buffered; flushed with each snapshot save)"""
+        if self._trade_log is not None:
+            self._trade_log.write(json_dumps({
+                'side': side,
+                'price': price,
+                'quantity': quantity,
+                'timestamp_ms': timestamp_ms,
+                'trade_id': trade_id
+            }) + b'\n')
+            
+    def close(self):
+        """Flush and close the trade log"""
+        if self._trade_log is not None:
+            self._trade_log.close()
+            self._trade_log = None
         
     async def initialize_historical_data(self, symbol: str):
         """Load 24-hour historical trade data"""
@@ -62,42 +114,48 @@ class MarketDataAnalyzer:
             end_ms = int(current_time.timestamp() * 1000)
             start_ms = int(start_time.timestamp() * 1000)
             
-            # Get recent trades using recent trades endpoint
-            trades = self.client.get_recent_trades(
+            # Get recent trades using recent trades endpoint; the client blocks, so run it off the event loop
+            trades = await asyncio.to_thread(
+                self.client.get_recent_trades,
                 symbol=symbol,
                 limit=1000  # Maximum allowed
             )
             
             # Filter trades within our time window
-            valid_trades = []
-            for trade in trades:
-                trade_time = int(trade['time'])
-                if start_ms <= trade_time <= end_ms:
-                    valid_trades.append(trade)
+            trade_times = np.fromiter((trade['time'] for trade in trades), dtype=np.int64, count=len(trades))
+            trade_ids = np.fromiter((trade['id'] for trade in trades), dtype=np.int64, count=len(trades))
+            valid = (trade_times >= start_ms) & (trade_times <= end_ms)
+            # On reconnect, skip trades already held so each side stays in time order for eviction
+            held_ids = [int(trades['trade_id'][-1]) for trades in self.trade_history.values() if len(trades)]
+            if held_ids:
+                valid &= trade_ids > max(held_ids)
+            valid_count = int(np.count_nonzero(valid))
             
-            logger.info(f"Retrieved {len(valid_trades)} valid trades within the last 24 hours")
+            logger.info(f"Retrieved {valid_count} valid trades within the last 24 hours")
             
-            # Process the valid trades
-            for trade in valid_trades:
-                price = float(trade['price'])
-                quantity = float(trade['qty'])
-                is_buyer = trade['isBuyerMaker']
-                trade_time = int(trade['time'])
-                
-                trade_data = {
-                    'quantity': quantity,
-                    'timestamp': datetime.fromtimestamp(trade_time / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC'),
-                    'trade_id': trade['id']
-                }
-                
-                # Add to appropriate list
-                if is_buyer:
-                    self.trade_history['bids'][price].append(trade_data)
-                else:
-                    self.trade_history['asks'][price].append(trade_data)
+            # Process the valid trades column-wise
+            prices = np.array([trade['price'] for trade in trades], dtype=np.float64)
+            quantities = np.array([trade['qty'] for trade in trades], dtype=np.float64)
+            is_buyer = np.fromiter((trade['isBuyerMaker'] for trade in trades), dtype=np.bool_, count=len(trades))
+            
+            for side, on_side in (('bids', is_buyer), ('asks', ~is_buyer)):
+                mask = valid & on_side
+                self.trade_history[side].extend(
+                    price=prices[mask],
+                    quantity=quantities[mask],
+                    timestamp_ms=trade_times[mask],
+                    trade_id=trade_ids[mask]
+                )
+                for row in zip(prices[mask].tolist(), quantities[mask].tolist(),
+                               trade_times[mask].tolist(), trade_ids[mask].tolist()):
+                    self._log_trade(side, *row)
+            
+            if valid_count:
+                newest_ms = int(trade_times[valid].max())
+                self.latest_trade_ts_ms = max(self.latest_trade_ts_ms or newest_ms, newest_ms)
             
             self.historical_data_loaded = True
-            logger.info(f"Successfully processed {len(valid_trades)} historical trades")
+            logger.info(f"Successfully processed {valid_count} historical trades")
             
             # Initialize order_filled with historical data
             await self._update_order_filled()
@@ -114,21 +172,18 @@ class MarketDataAnalyzer:
                 return False
 
             # Check if we have both bids and asks
-            if not self.trade_history['bids'] or not self.trade_history['asks']:
+            if not len(self.trade_history['bids']) or not len(self.trade_history['asks']):
                 logger.warning("Missing bid or ask historical data")
                 return False
 
             # Verify timestamps are within expected range
-            now = datetime.now(tz=timezone.utc)
-            cutoff_time = now - timedelta(days=1)
+            cutoff_ms = time.time_ns() // 1_000_000 - DAY_MS
             
             for side in ['bids', 'asks']:
-                for price, trades in self.trade_history[side].items():
-                    for trade in trades:
-                        trade_time = datetime.strptime(trade['timestamp'], '%Y-%m-%d %H:%M:%S UTC').replace(tzinfo=timezone.utc)
-                        if trade_time < cutoff_time:
-                            logger.warning(f"Found outdated trade data: {trade['timestamp']}")
-                            return False
+                oldest_ms = int(self.trade_history[side]['timestamp_ms'].min())
+                if oldest_ms < cutoff_ms:
+                    logger.warning(f"Found outdated trade data: {format_candle_time(oldest_ms)}")
+                    return False
 
             logger.info("Historical data verification passed")
             return True
@@ -140,62 +195,83 @@ class MarketDataAnalyzer:
     async def cleanup_old_data(self):
         """Remove trade data older than cleanup_threshold"""
         try:
-            now = datetime.now(tz=timezone.utc)
+            cutoff_ms = time.time_ns() // 1_000_000 - int(self.cleanup_threshold.total_seconds() * 1000)
             cleaned = 0
 
             for side in ['bids', 'asks']:
-                for price in list(self.trade_history[side].keys()):
-                    trades = self.trade_history[side][price]
-                    updated_trades = []
-
-                    for trade in trades:
-                        trade_time = datetime.strptime(trade['timestamp'], '%Y-%m-%d %H:%M:%S UTC').replace(tzinfo=timezone.utc)
-                        if now - trade_time <= self.cleanup_threshold:
-                            updated_trades.append(trade)
-                        else:
-                            cleaned += 1
+                # Trades are queued oldest first, so only the expired head is touched
+                evicted = self.trade_history[side].evict_before(cutoff_ms)
+                if not len(evicted['price']):
+                    continue
+                cleaned += len(evicted['price'])
 
-                    if updated_trades:
-                        self.trade_history[side][price] = updated_trades
+                # Take the evicted trades back out of their price levels' aggregates
+                levels, level_of_trade = np.unique(evicted['price'], return_inverse=True)
+                quantities = np.bincount(level_of_trade, weights=evicted['quantity'], minlength=len(levels))
+                counts = np.bincount(level_of_trade, minlength=len(levels))
+                order_filled = self.order_filled[side]
+                for price, quantity, count in zip(levels.tolist(), quantities.tolist(), counts.tolist()):
+                    filled = order_filled.get(price)
+                    if filled is None:
+                        continue
+                    filled['trade_count'] -= count
+                    if filled['trade_count'] <= 0:
+                        del order_filled[price]
                     else:
-                        del self.trade_history[side][price]
+                        # last_update_ms stays: the level's newest trade is newer than anything evicted
+                        filled['total_quantity'] -= quantity
 
             if cleaned > 0:
-                logger.info(f"Cleaned up {cleaned} old trade records")
+                logger.info("Cleaned up %d old trade records", cleaned)
 
         except Exception as e:
             logger.error(f"Error during data cleanup: {str(e)}")
 
     async def _update_order_filled(self):
-        """Update order_filled data structure"""
+        """
+        Rebuild order_filled from the full trade history.
+        Live trades and cleanup update it incrementally; this only seeds it after loading history.
+        """
         if not self.historical_data_loaded:
             return
             
-        # Process bids
-        for price, trades in self.trade_history['bids'].items():
-            self.order_filled['bids'][price] = {
-                'total_quantity': sum(t['quantity'] for t in trades),
-                'trade_count': len(trades),
-                'last_update': max(t['timestamp'] for t in trades)
-            }
+        self.order_filled['bids'].clear()
+        self.order_filled['asks'].clear()
+        
+        for side in ['bids', 'asks']:
+            trades = self.trade_history[side]
+            if not len(trades):
+                continue
+            # Group trades by price level in NumPy, then emit one dict per level
+            levels, level_of_trade = np.unique(trades['price'], return_inverse=True)
+            total_quantity = np.bincount(level_of_trade, weights=trades['quantity'], minlength=len(levels))
+            trade_count = np.bincount(level_of_trade, minlength=len(levels))
+            last_update_ms = np.full(len(levels), np.iinfo(np.int64).min)
+            np.maximum.at(last_update_ms, level_of_trade, trades['timestamp_ms'])
             
-        # Process asks
-        for price, trades in self.trade_history['asks'].items():
-            self.order_filled['asks'][price] = {
-                'total_quantity': sum(t['quantity'] for t in trades),
-                'trade_count': len(trades),
-                'last_update': max(t['timestamp'] for t in trades)
-            }
+            for price, quantity, count, last_ms in zip(
+                levels.tolist(), total_quantity.tolist(), trade_count.tolist(), last_update_ms.tolist()
+            ):
+                self.order_filled[side][price] = {
+                    'total_quantity': quantity,
+                    'trade_count': count,
+                    'last_update_ms': last_ms
+                }
             
     async def start_market_stream(self, symbol: str = 'btcusdt'):
         """Start WebSocket stream for market data"""
         logger.info(f"Starting market stream for {symbol}")
+        self._open_trade_log(symbol)
         
         while True:  # Main reconnection loop
             try:
                 # First load historical data
                 await self.initialize_historical_data(symbol.upper())
                 
+                # Evict trades that expired since the last periodic cleanup, so a reconnect
+                # does not fail verification on them forever
+                await self.cleanup_old_data()
+
                 # Verify historical data
                 if not await self.verify_historical_data():
                     logger.error("Historical data verification failed")
@@ -214,9 +290,10 @@ class MarketDataAnalyzer:
                     f"{symbol}@depth@100ms",
                     f"{symbol}@trade"
                 ]) as stream:
-                    cleanup_counter = 0
                     message_counter = 0
                     last_message_time = datetime.now(tz=timezone.utc)
+                    last_save = 0.0
+                    last_cleanup = time.monotonic()
                     
                     while True:
                         try:
@@ -238,22 +315,19 @@ class MarketDataAnalyzer:
                             elif 'trade' in stream_type:
                                 await self._process_trade_message(msg['data'])
                             
-                            # Increment message counter
                             message_counter += 1
-                            if message_counter % 100 == 0:
-                                logger.info(f"Processed {message_counter} messages")
                             
-                            # Periodic cleanup (every 1000 messages)
-                            cleanup_counter += 1
-                            if cleanup_counter >= 1000:
+                            # Housekeeping is per batch of messages, not per message
+                            now = time.monotonic()
+                            if now - last_cleanup >= CLEANUP_INTERVAL:
                                 await self.cleanup_old_data()
-                                cleanup_counter = 0
-                            
-                            # Update order filled data
-                            await self._update_order_filled()
+                                last_cleanup = now
                             
-                            # Save current state
-                            await self._save_market_data(symbol)
+                            if now - last_save >= SAVE_INTERVAL:
+                                logger.info("Processed %d messages", message_counter)
+                                await self._save_market_data(symbol)
+                                self._trade_log.flush()
+                                last_save = time.monotonic()
                             
                             # Check for connection health
                             if (current_time - last_message_time).total_seconds() > 30:
@@ -278,11 +352,12 @@ class MarketDataAnalyzer:
     async def _get_order_book_snapshot(self, symbol: str) -> Dict:
         """Get initial order book snapshot"""
         try:
-            depth = self.client.get_order_book(symbol=symbol, limit=1000)
+            # Blocking REST call, run off the event loop so the stream keeps draining
+            depth = await asyncio.to_thread(self.client.get_order_book, symbol=symbol, limit=1000)
             
             # Initialize order book with snapshot
-            self.orderbook['bids'] = {float(price): float(qty) for price, qty in depth['bids']}
-            self.orderbook['asks'] = {float(price): float(qty) for price, qty in depth['asks']}
+            self.orderbook['bids'] = SortedDict((float(price), float(qty)) for price, qty in depth['bids'])
+            self.orderbook['asks'] = SortedDict((float(price), float(qty)) for price, qty in depth['asks'])
             
             return depth
             
@@ -293,21 +368,21 @@ class MarketDataAnalyzer:
     async def _process_depth_message(self, msg: Dict):
         """Process order book update"""
         try:
-            # Update bids
-            for bid in msg.get('b', []):
-                price, quantity = float(bid[0]), float(bid[1])
-                if quantity > 0:
-                    self.orderbook['bids'][price] = quantity
-                else:
-                    self.orderbook['bids'].pop(price, None)
-                    
-            # Update asks
-            for ask in msg.get('a', []):
-                price, quantity = float(ask[0]), float(ask[1])
-                if quantity > 0:
-                    self.orderbook['asks'][price] = quantity
-                else:
-                    self.orderbook['asks'].pop(price, None)
+            for side, key in (('bids', 'b'), ('asks', 'a')):
+                updates = msg.get(key)
+                if not updates:
+                    continue
+                # Parse the [price, quantity] decimal strings of the whole update in one C pass.
+                # Each price level appears at most once per depth event, so sets and removals can be split
+                levels = np.asarray(updates, dtype=np.float64).reshape(-1, 2)
+                live = levels[:, 1] > 0
+                
+                book = self.orderbook[side]
+                # One bulk update for all changed levels instead of a setitem per level
+                book.update(levels[live].tolist())
+                # A zero quantity removes the level
+                for price in levels[~live, 0].tolist():
+                    book.pop(price, None)
                     
         except Exception as e:
             logger.error(f"Error processing depth message: {str(e)}")
@@ -321,118 +396,118 @@ class MarketDataAnalyzer:
             # Use the actual trade timestamp from Binance
             trade_time = int(msg['T'])
             
-            trade_data = {
-                'quantity': quantity,
-                'timestamp': datetime.fromtimestamp(trade_time / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC'),
-                'trade_id': msg['t']
-            }
-            
-            # Add to appropriate list
-            if is_buyer:
-                self.trade_history['bids'][price].append(trade_data)
-            else:
-                self.trade_history['asks'][price].append(trade_data)
-            
-            # Update order filled data
-            await self._update_order_filled()
+            # Add to appropriate side
+            side = 'bids' if is_buyer else 'asks'
+            self.trade_history[side].append(price, quantity, trade_time, msg['t'])
+            self._log_trade(side, price, quantity, trade_time, msg['t'])
+            if self.latest_trade_ts_ms is None or trade_time > self.latest_trade_ts_ms:
+                self.latest_trade_ts_ms = trade_time
             
-            # Cleanup old data periodically
-            self.message_counter += 1
-            if self.message_counter % 100 == 0:
-                await self.cleanup_old_data()
+            # Fold the trade into the running aggregates for its price level
+            if self.historical_data_loaded:
+                filled = self.order_filled[side].get(price)
+                if filled:
+                    filled['total_quantity'] += quantity
+                    filled['trade_count'] += 1
+                    filled['last_update_ms'] = max(filled['last_update_ms'], trade_time)
+                else:
+                    self.order_filled[side][price] = {
+                        'total_quantity': quantity,
+                        'trade_count': 1,
+                        'last_update_ms': trade_time
+                    }
             
         except Exception as e:
             logger.error(f"Error processing trade message: {str(e)}")
             
-    def _calculate_unfilled_orders(self):
-        """Calculate unfilled orders summary with price levels and values"""
-        unfilled_summary = {
-            'bids': [],
-            'asks': []
-        }
+    def _calculate_unfilled_orders(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Calculate unfilled orders summary with price levels and values.
+        Returns per side parallel arrays: price, quantity, value, cumulative_quantity, cumulative_value
+        """
+        unfilled_summary = {}
         
         # Process unfilled orders for both sides
         for side in ['bids', 'asks']:
-            total_value = 0
-            total_quantity = 0
+            book = self.orderbook[side]
+            prices = np.fromiter(book.keys(), dtype=np.float64, count=len(book))
+            quantities = np.fromiter(book.values(), dtype=np.float64, count=len(book))
+            if SortedDict is dict:
+                order = np.argsort(prices)
+                prices, quantities = prices[order], quantities[order]
             
-            # Sort prices (descending for bids, ascending for asks)
-            prices = sorted(self.orderbook[side].keys(), 
-                          key=float, 
-                          reverse=(side == 'bids'))
+            # Prices descending for bids, ascending for asks
+            if side == 'bids':
+                prices, quantities = prices[::-1], quantities[::-1]
+            values = prices * quantities
             
-            for price in prices:
-                price_float = float(price)
-                quantity = self.orderbook[side][price]
-                value = price_float * quantity
-                
-                total_quantity += quantity
-                total_value += value
-                
-                unfilled_summary[side].append({
-                    'price': price_float,
-                    'quantity': quantity,
-                    'value': value,
-                    'cumulative_quantity': total_quantity,
-                    'cumulative_value': total_value
-                })
+            unfilled_summary[side] = {
+                'price': prices,
+                'quantity': quantities,
+                'value': values,
+                'cumulative_quantity': np.cumsum(quantities),
+                'cumulative_value': np.cumsum(values)
+            }
         
         return unfilled_summary
 
+    @staticmethod
+    def _levels_to_dicts(levels: Dict[str, np.ndarray]) -> List[Dict[str, float]]:
+        """Materialize one side of the unfilled orders summary as a list of per-level dicts"""
+        names = list(levels)
+        return [dict(zip(names, row)) for row in zip(*(levels[name].tolist() for name in names))]
+
     async def _save_market_data(self, symbol: str):
-        """Save all market data to JSON file"""
+        """Save the order book summary and market metrics to a JSON file (trades go to the NDJSON trade log)"""
         try:
-            # Get latest timestamp from trades
-            latest_timestamp = None
-            for side in ['bids', 'asks']:
-                for trades in self.trade_history[side].values():
-                    for trade in trades:
-                        trade_time = datetime.strptime(trade['timestamp'], "%Y-%m-%d %H:%M:%S UTC")
-                        if latest_timestamp is None or trade_time > latest_timestamp:
-                            latest_timestamp = trade_time
-
-            if latest_timestamp is None:
-                latest_timestamp = datetime.now(timezone.utc)
+            # Timestamp of the latest trade, tracked as trades arrive
+            latest_ms = self.latest_trade_ts_ms
+            if latest_ms is None:
+                latest_ms = time.time_ns() // 1_000_000
 
             # Calculate unfilled orders summary
             unfilled_summary = self._calculate_unfilled_orders()
             
             # Calculate market metrics
-            market_metrics = {
-                'bids': {
-                    'total_value': sum(level['value'] for level in unfilled_summary['bids']),
-                    'total_quantity': sum(level['quantity'] for level in unfilled_summary['bids']),
-                    'price_levels': len(unfilled_summary['bids']),
-                    'best_bid': unfilled_summary['bids'][0]['price'] if unfilled_summary['bids'] else None
-                },
-                'asks': {
-                    'total_value': sum(level['value'] for level in unfilled_summary['asks']),
-                    'total_quantity': sum(level['quantity'] for level in unfilled_summary['asks']),
-                    'price_levels': len(unfilled_summary['asks']),
-                    'best_ask': unfilled_summary['asks'][0]['price'] if unfilled_summary['asks'] else None
+            market_metrics = {}
+            for side, best_key in (('bids', 'best_bid'), ('asks', 'best_ask')):
+                levels = unfilled_summary[side]
+                price_levels = len(levels['price'])
+                market_metrics[side] = {
+                    'total_value': float(levels['cumulative_value'][-1]) if price_levels else 0,
+                    'total_quantity': float(levels['cumulative_quantity'][-1]) if price_levels else 0,
+                    'price_levels': price_levels,
+                    best_key: float(levels['price'][0]) if price_levels else None
                 }
-            }
 
             # Prepare data for saving
             market_data = {
-                'timestamp': latest_timestamp.strftime("%Y-%m-%d %H:%M:%S UTC"),
+                'timestamp': format_candle_time(latest_ms),
                 'symbol': symbol.lower(),
-                'unfilled_orders': unfilled_summary,
-                'market_metrics': market_metrics,
-                'trade_history': self.trade_history
+                'unfilled_orders': {side: self._levels_to_dicts(levels) for side, levels in unfilled_summary.items()},
+                'market_metrics': market_metrics
             }
 
-            # Save to file
+            # Serialize here, while the live structures cannot change underneath,
+            # and leave only the disk write to a worker thread
             filename = f'data/market_data_{symbol.lower()}.json'
-            os.makedirs(os.path.dirname(filename), exist_ok=True)
-            
-            with open(filename, 'w') as f:
-                json.dump(market_data, f, indent=2)
-            logger.info(f"Saved market data to {filename}")
+            payload = json_dumps(market_data)
+            await asyncio.to_thread(self._write_file, filename, payload)
+            logger.info("Saved market data to %s", filename)
 
         except Exception as e:
             logger.error(f"Error saving market data: {str(e)}")
 
+    @staticmethod
+    def _write_file(filename: str, payload: bytes):
+        """Write payload to filename atomically"""
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            f.write(payload)
+        # Readers never see a half-written snapshot
+        os.replace(tmp_filename, filename)
+
 def run_analyzer(symbol: str = 'BTCUSDT'):
     """Run the market data analyzer"""
     async def main():
@@ -443,6 +518,12 @@ def run_analyzer(symbol: str = 'BTCUSDT'):
             logger.info("Shutting down gracefully...")
         except Exception as e:
             logger.error(f"Error in market stream: {str(e)}")
+        finally:
+            analyzer.close()
+
+    if uvloop is not None:
+        # libuv-based loop: cheaper socket reads for the WebSocket consumer
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
     try:
         asyncio.run(main())
@@ -1,39 +1,45 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 from datetime import datetime
 from pathlib import Path
 
-def setup_logger(name: str, level=logging.DEBUG):
-    """Setup logger with file and console handlers"""
+def setup_logger(name: str, level=logging.INFO):
+    """
+    Setup logger with a file handler; nothing goes to the console, which the monitor's display owns.
+    Records are handed to a background thread through a queue, so file I/O never runs on the caller's thread.
+    """
     # Create logger
     logger = logging.getLogger(name)
+    if logger.handlers:
+        # Already set up (e.g. module imported twice): reuse it unchanged, level included
+        return logger
     logger.setLevel(level)
+    # Records stay out of the root logger's handlers
+    logger.propagate = False
     
     # Create logs directory if it doesn't exist
     logs_dir = Path(__file__).parent.parent.parent / 'logs'
     logs_dir.mkdir(exist_ok=True)
     
-    # Create formatters
+    # Create formatter
     file_formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
-    console_formatter = logging.Formatter(
-        '%(levelname)s - %(message)s'
-    )
     
     # Create file handler
     log_file = logs_dir / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
     file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.DEBUG)
+    file_handler.setLevel(level)
     file_handler.setFormatter(file_formatter)
     
-    # Create console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)  # Log everything to console
-    console_handler.setFormatter(console_formatter)
-    
-    # Add handlers to logger
-    logger.addHandler(file_handler)
-    # logger.addHandler(console_handler)
+    # Add handlers to logger: the listener thread writes what the queue handler enqueues
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     return logger 
\ No newline at end of file
@@ -1,6 +1,7 @@
 from typing import List, Dict, Any
-import pandas as pd
+import numpy as np
 import datetime
+from src.utils.candles import candles_to_soa, format_candle_time, parse_candle_time
 
 class MitigationDetector:
     """
@@ -15,27 +16,42 @@ class MitigationDetector:
         Args:
             candles: List of candlestick data, each candle containing Time, Open, High, Low, Close
         """
-        # Reverse the candles to get chronological order (oldest first)
-        self.candles = list(reversed(candles))
-        # Pre-convert all timestamps once
-        for candle in self.candles:
-            candle['timestamp'] = datetime.datetime.strptime(candle['Time'], '%Y-%m-%d %H:%M:%S UTC').timestamp()
+        # Columns are built in chronological order (oldest first) with epoch-ms timestamps
+        self.update(candles_to_soa(candles))
+
+    @classmethod
+    def from_soa(cls, candles_soa: Dict[str, np.ndarray]) -> 'MitigationDetector':
+        """
+        Create a mitigation detector directly from struct-of-arrays candle columns.
+
+        Args:
+            candles_soa: Dict of parallel arrays (time, open, high, low, close, volume), oldest first
+        """
+        detector = cls.__new__(cls)
+        detector.update(candles_soa)
+        return detector
+
+    def update(self, candles_soa: Dict[str, np.ndarray]):
+        """Point the detector at new candle columns without reallocating them"""
+        self.time = candles_soa['time']
+        self.high = candles_soa['high']
+        self.low = candles_soa['low']
     
-    def _get_timeframe_seconds(self) -> float:
-        """Calculate timeframe in seconds from first two candles"""
-        if len(self.candles) < 2:
+    def _get_timeframe_ms(self) -> int:
+        """Calculate timeframe in milliseconds from first two candles"""
+        if len(self.time) < 2:
             return 0
-        return abs(self.candles[0]['timestamp'] - self.candles[1]['timestamp'])
+        return abs(int(self.time[0]) - int(self.time[1]))
     
     def check_mitigations(self, bullish_fvgs: List[Dict[str, Any]], bearish_fvgs: List[Dict[str, Any]]):
         """
         Check if each FVG has been mitigated by subsequent price action.
         Records both the first and last candles that enter the FVG zone.
         """
-        if len(self.candles) < 2:
+        if len(self.time) < 2:
             return
             
-        timeframe_seconds = self._get_timeframe_seconds()
+        timeframe_ms = self._get_timeframe_ms()
         
         def check_fvg_mitigation(fvg: Dict[str, Any], is_bullish: bool):
             """Helper function to check mitigation for a single FVG"""
@@ -43,6 +59,7 @@ class MitigationDetector:
                 fvg.update({
                     'status': 'unfilled',
                     'first_mitigation_time': None,
+                    'first_mitigation_time_ms': None,
                     'last_mitigation_time': None,
                     'time_to_mitigation': None
                 })
@@ -50,34 +67,38 @@ class MitigationDetector:
             if fvg['status'] == 'mitigated':
                 return
             
-            fvg_timestamp = datetime.datetime.strptime(fvg['time'], '%Y-%m-%d %H:%M:%S UTC').timestamp()
-            formation_complete_time = fvg_timestamp + timeframe_seconds
+            fvg_timestamp = fvg.get('time_ms')
+            if fvg_timestamp is None:
+                fvg_timestamp = parse_candle_time(fvg['time'])
+            formation_complete_time = fvg_timestamp + timeframe_ms
             
-            # Filter and sort candles after formation (already in chronological order)
-            candles_after = [c for c in self.candles if c['timestamp'] > formation_complete_time]
+            # First candle after formation; columns are chronological, so binary search for it
+            first_after = int(np.searchsorted(self.time, formation_complete_time, side='right'))
+            
+            # Flag every later candle whose price enters the gap zone
+            price_in_gap = (
+                self.low[first_after:] <= fvg['gap_high'] if is_bullish
+                else self.high[first_after:] >= fvg['gap_low']
+            )
+            if not price_in_gap.any():
+                return
             
-            in_gap_zone = False
-            first_mitigation_found = False
+            # First mitigation is the first flagged candle; the last is the end of that contiguous run
+            first_idx = int(np.argmax(price_in_gap))
+            run = price_in_gap[first_idx:]
+            run_length = len(run) if run.all() else int(np.argmin(run))
+            first_idx += first_after
+            last_idx = first_idx + run_length - 1
             
-            for current_candle in candles_after:
-                # Check if price enters gap zone
-                price_in_gap = (
-                    current_candle['Low'] <= fvg['gap_high'] if is_bullish
-                    else current_candle['High'] >= fvg['gap_low']
-                )
-                
-                if price_in_gap:
-                    if not first_mitigation_found:
-                        fvg['status'] = 'mitigated'
-                        fvg['first_mitigation_time'] = current_candle['Time']
-                        time_diff = current_candle['timestamp'] - formation_complete_time
-                        fvg['time_to_mitigation'] = time_diff / 3600  # Convert to hours
-                        first_mitigation_found = True
-                    in_gap_zone = True
-                    fvg['last_mitigation_time'] = current_candle['Time']
-                else:
-                    if in_gap_zone:
-                        break
+            first_time_ms = int(self.time[first_idx])
+            candle_time = format_candle_time(first_time_ms)
+            fvg['status'] = 'mitigated'
+            fvg['first_mitigation_time'] = candle_time
+            fvg['first_mitigation_time_ms'] = first_time_ms
+            fvg['_mit_date'], fvg['_mit_time'] = candle_time.split()[:2]
+            time_diff = first_time_ms - formation_complete_time
+            fvg['time_to_mitigation'] = time_diff / 3_600_000  # Convert to hours
+            fvg['last_mitigation_time'] = format_candle_time(int(self.time[last_idx]))
         
         # Check mitigations for both types of FVGs
         for fvg in bullish_fvgs:
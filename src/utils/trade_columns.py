@@ -0,0 +1,78 @@
+from typing import Dict
+import numpy as np
+
+# Column layout of the struct-of-arrays trade buffer
+TRADE_DTYPES = {
+    'price': 'f8',
+    'quantity': 'f8',
+    'timestamp_ms': 'i8',  # Binance trade time, epoch milliseconds (UTC)
+    'trade_id': 'i8',
+}
+
+class TradeColumns:
+    """
+    Growable struct-of-arrays queue of trades for one order book side, oldest first.
+    Trades are appended at the tail and evicted from the head; capacity doubles
+    when full, so both are amortized O(1).
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._buffers = {name: np.empty(capacity, dtype=dtype) for name, dtype in TRADE_DTYPES.items()}
+        # Live rows are _buffers[name][_start:_start + _size]
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """View of the live part of one column"""
+        return self._buffers[name][self._start:self._start + self._size]
+
+    def _reserve(self, count: int):
+        """Make room for count more rows at the tail"""
+        capacity = len(self._buffers['price'])
+        if self._start + self._size + count <= capacity:
+            return
+        # Reclaim the evicted head first, and only grow if that is not enough
+        while self._size + count > capacity:
+            capacity *= 2
+        for name, buffer in self._buffers.items():
+            live = buffer[self._start:self._start + self._size]
+            if capacity == len(buffer):
+                buffer[:self._size] = live
+            else:
+                grown = np.empty(capacity, dtype=buffer.dtype)
+                grown[:self._size] = live
+                self._buffers[name] = grown
+        self._start = 0
+
+    def append(self, price: float, quantity: float, timestamp_ms: int, trade_id: int):
+        """Add one trade at the tail"""
+        self._reserve(1)
+        i = self._start + self._size
+        self._buffers['price'][i] = price
+        self._buffers['quantity'][i] = quantity
+        self._buffers['timestamp_ms'][i] = timestamp_ms
+        self._buffers['trade_id'][i] = trade_id
+        self._size += 1
+
+    def extend(self, **columns: np.ndarray):
+        """Add a batch of trades given as one array per column"""
+        count = len(columns['price'])
+        self._reserve(count)
+        end = self._start + self._size
+        for name, buffer in self._buffers.items():
+            buffer[end:end + count] = columns[name]
+        self._size += count
+
+    def evict_before(self, timestamp_ms: int) -> Dict[str, np.ndarray]:
+        """
+        Drop the trades older than timestamp_ms from the head.
+        Relies on trades being appended in time order; returns copies of the evicted rows.
+        """
+        count = int(np.searchsorted(self['timestamp_ms'], timestamp_ms, side='left'))
+        evicted = {name: self[name][:count].copy() for name in self._buffers}
+        self._start += count
+        self._size -= count
+        return evicted